@@ -0,0 +1,201 @@
+from math import isqrt
+from time import monotonic
+import numpy as np
+from board_format import as_board, EMPTY_CHARS, NUM_CHARS, SIZES
+from solver import SolveResult, SolverInterrupted, solve, STRATEGIES
+
+if not hasattr(np, "bitwise_count"):  # Added in NumPy 2.0
+    raise ImportError(f"batch_solver needs numpy>=2, found {np.__version__}")
+
+# Char code -> num (-1 if not a num or empty char), for parsing strings in bulk
+_CHAR_NUMS = np.full(128, -1, dtype=np.int32)
+for _num, _char in enumerate(NUM_CHARS, start=1):
+    _CHAR_NUMS[ord(_char)] = _CHAR_NUMS[ord(_char.lower())] = _num
+for _char in EMPTY_CHARS:
+    _CHAR_NUMS[ord(_char)] = 0
+
+
+class _Layout:
+    """Index arrays for a board size: the unit of every cell, the cells of every unit."""
+
+    def __init__(self, box_size: int) -> None:
+        size = box_size * box_size
+        cells = np.arange(size * size)
+        self.size = size
+        self.all_nums = (1 << size) - 1
+        rows, cols = cells // size, cells % size
+        boxes = (rows // box_size) * box_size + cols // box_size
+        # Units: rows (0 to size - 1), then cols, then boxes
+        self.cell_units = (rows, size + cols, 2 * size + boxes)
+        self.unit_cells = np.concatenate(
+            [
+                cells.reshape(size, size),
+                cells.reshape(size, size).T,
+                cells[np.argsort(boxes, kind="stable")].reshape(size, size),
+            ]
+        )
+
+
+def _as_grids(puzzles: list) -> np.ndarray | None:
+    """
+    Return the puzzles as an (N, size, size) array if they are all valid grids or
+    all valid strings of the same size, else None (check them one by one instead).
+    """
+    try:
+        if all(isinstance(puzzle, str) for puzzle in puzzles):
+            texts = np.array([puzzle.strip() for puzzle in puzzles])
+            if (np.char.str_len(texts) != texts.itemsize // 4).any():
+                return None  # Not all the same length
+            codes = texts.view(np.uint32).reshape(len(puzzles), -1)
+            grids = _CHAR_NUMS[np.minimum(codes, 127)]
+            size = isqrt(grids.shape[1])
+            grids = grids.reshape(len(puzzles), size, size)
+        else:
+            grids = np.array(puzzles)
+    except ValueError:  # Ragged grids, or a size that is not a square
+        return None
+    if (
+        grids.ndim != 3
+        or grids.dtype.kind not in "iu"
+        or grids.shape[1] not in SIZES
+        or grids.shape[1] != grids.shape[2]
+        or (grids < 0).any()
+        or (grids > grids.shape[1]).any()
+    ):
+        return None
+    return grids.astype(np.int32)  # Room for 25 bit masks
+
+
+def _used_nums(grids: np.ndarray, layout: _Layout) -> tuple[np.ndarray, np.ndarray]:
+    """Return the used nums of every unit as bitmasks, and whether a num repeats."""
+    bits = np.where(grids > 0, 1 << np.maximum(grids - 1, 0), 0)
+    in_units = bits[:, layout.unit_cells]
+    used = np.bitwise_or.reduce(in_units, axis=2)
+    repeated = (np.bitwise_count(used) != np.count_nonzero(in_units, axis=2)).any(1)
+    return used, repeated
+
+
+def _propagate(grids: np.ndarray, layout: _Layout) -> np.ndarray:
+    """
+    Put the naked and hidden singles of every board in grids, in-place, until none
+    are left. Return the status of each board: 1 solved, 0 stuck, -1 contradiction.
+    """
+    status = np.zeros(len(grids), dtype=np.int8)
+    row_units, col_units, box_units = layout.cell_units
+    active = np.arange(len(grids))
+    while len(active):
+        grid = grids[active]
+        used, repeated = _used_nums(grid, layout)
+        empty = grid == 0
+
+        candidates = ~(used[:, row_units] | used[:, col_units] | used[:, box_units])
+        candidates &= layout.all_nums
+        candidates[~empty] = 0
+        counts = np.bitwise_count(candidates)
+        dead = (empty & (counts == 0)).any(1)
+
+        # Nums possible in at least once / at least twice among the cells of a unit
+        once = np.zeros_like(used)
+        twice = np.zeros_like(used)
+        for cell in layout.unit_cells.T:
+            in_units = candidates[:, cell]
+            twice |= once & in_units
+            once |= in_units
+        dead |= ((once | used) != layout.all_nums).any(1)  # Some num has nowhere to go
+
+        hidden = once & ~twice
+        hidden = candidates & (
+            hidden[:, row_units] | hidden[:, col_units] | hidden[:, box_units]
+        )
+        hidden_counts = np.bitwise_count(hidden)
+        dead |= (hidden_counts > 1).any(1)  # Cell is the only place for 2 nums
+        dead |= repeated
+
+        singles = np.where(counts == 1, candidates, hidden)
+        singles[hidden_counts > 1] = 0
+        found = singles != 0
+        # Index of the single set bit, + 1
+        grid[found] = np.bitwise_count(singles[found] - 1) + 1
+
+        progress = found.any(1) & ~dead
+        grids[active[progress]] = grid[progress]
+        status[active[dead]] = -1
+        solved = ~dead & ~progress & ~empty.any(1)
+        status[active[solved]] = 1
+        active = active[progress]
+    return status
+
+
+def solve_batch(
+    puzzles,
+    strategy: str = "mrv",
+    propagate: bool = True,
+    timeout: float | None = None,
+) -> list[SolveResult]:
+    """
+    Solve boards or puzzle strings (see parse_board) together: put the singles of
+    every board at once with NumPy, then finish the boards left unsolved one by one
+    with solve(strategy, propagate).
+    Return a SolveResult per puzzle in input order; a puzzle that fails gets its
+    error message instead of stopping the batch.
+    timeout (seconds) bounds the work spent on each unsolved board.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    puzzles = list(puzzles)
+    results = [None] * len(puzzles)
+    grids = _as_grids(puzzles) if puzzles else None
+    if grids is not None:  # Common case, no need to check the puzzles one by one
+        batches = [(list(range(len(puzzles))), grids)]
+    else:
+        boards_by_size = {}  # Size -> (index, board) of every valid puzzle
+        for index, puzzle in enumerate(puzzles):
+            try:
+                board = as_board(puzzle)
+            except ValueError as error:
+                results[index] = SolveResult(index, None, str(error))
+                continue
+            boards_by_size.setdefault(len(board), []).append((index, board))
+        batches = [
+            (
+                [index for index, _ in boards],
+                np.array([board for _, board in boards], dtype=np.int32),
+            )
+            for boards in boards_by_size.values()
+        ]
+
+    for indices, grids in batches:
+        count, size = len(indices), grids.shape[1]
+        layout = _Layout(isqrt(size))
+        grids = grids.reshape(count, size * size)
+
+        _, invalid = _used_nums(grids, layout)
+        status = _propagate(grids, layout)
+        for index, grid, invalid_input, board_status in zip(
+            indices, grids.reshape(count, size, size).tolist(), invalid, status
+        ):
+            if invalid_input:
+                results[index] = SolveResult(index, None, "Invalid Board Input")
+            elif board_status < 0:
+                results[index] = SolveResult(index, None, "No Solution")
+            elif board_status > 0:
+                results[index] = SolveResult(index, grid, None)
+            else:
+                results[index] = _finish(index, grid, strategy, propagate, timeout)
+    return results
+
+
+def _finish(
+    index: int,
+    board: list[list[int]],
+    strategy: str,
+    propagate: bool,
+    timeout: float | None,
+) -> SolveResult:
+    deadline = monotonic() + timeout if timeout is not None else None
+    try:
+        solve(board, strategy, propagate, deadline=deadline)
+    except (ValueError, SolverInterrupted) as error:
+        return SolveResult(index, None, str(error))
+    return SolveResult(index, board, None)
@@ -0,0 +1,472 @@
+"""
+Reproducible benchmarks for the solver, enumerator, and generator hot paths.
+    python benchmark.py                               Run and print a table
+    python benchmark.py -o new.json -c old.json       Save, and flag regressions vs old
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from itertools import islice
+from board_format import parse_board
+from game_generator import create_game, DIFFICULTY_REMOVAL_RANGES
+from solution_cache import canonical_form
+from solver import all_solutions, count_solutions, has_unique_solution, solve
+
+try:
+    from batch_solver import solve_batch
+except ImportError:  # numpy is optional, skip the batch cases without it
+    solve_batch = None
+
+
+SEED = 2024
+# Known hard puzzles, each with a unique solution
+HARD_PUZZLES = [
+    # 17 clues (Gordon Royle's collection)
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    "000000010400000000020000000000050604008000300001090000300400200050100000000807000",
+    "000000012000035000000600070700000300000400800100000000000120000080000040050000600",
+    # AI Escargot, Platinum Blonde, Golden Nugget
+    "100007090030020008009600500005300900010080002600004000300000010040000007007000300",
+    "000000012000000003002300400001800005060070800000009000008500000900040500470006000",
+    "000000039000001005003050800008090006070002000100400000009080050020000600400700000",
+]
+# Generated boards, checked in so that changes to the generator don't change
+# what the solver cases measure (create_game/* cases still use the generator)
+EASY_PUZZLES = [
+    "300900014084360000070048563207009030006020058009600400025194300000500000008732090",
+    "005930000001008027680072500846725009090043060100000704950200300060010298702309600",
+    "000000982020709360809052070004970816618004000095860423147600050080007030000100000",
+    "003608001056204890000031600008100900002060008069803002645300010207400085800007040",
+    "600380905873040602009006708204700090090001407087000006930004850050800370718905000",
+    "075060104640780000320000768007601035004820670062300009000206590093078000000100080",
+    "030600420050982601800000000080000146200540087070831000010700000347098265920065703",
+    "750900640036012080040000310800560093090238107510094026009000560005306000107050004",
+    "105830000203040800407600001041900205000301090006005700514060320000210007600590148",
+    "009000000540300900180690400907100648360080097008000250090006010206001704030002569",
+    "400685039358109000600030085007900003004060000003021590006392000000807362700406018",
+    "090040305060000400080930000504300609019687000620004703002803001006471030700250000",
+    "089507000100020009005906001600784005004100870070290060002600000507040600810352947",
+    "790006824100084000064200170009810507000463902001590006307020490040000250010040063",
+    "109500070805100003030000010510070360962001084040208109306902040400680001250704008",
+    "060570020050400186380006705040001090810957064700064802000130008030000400170040030",
+    "140000000060750001030020697415092700723465019600310400056009100000670502000003906",
+    "801054067567000390000069000000030086000628901080005700605100400308006129010000650",
+    "085920000000005204672041090200130050547200910019570608004600000806002500900408700",
+    "004003560590100200800500049081005007905000806327860000769000080100040795058719000",
+]
+MEDIUM_PUZZLES = [
+    "090230067700500021000679403185002004200800100009107000600400200002985000003720000",
+    "012390005000007008090050000273460500000000760659002043905008420700019800008040007",
+    "300004000200800601100007923600278190000005008009401030803000000000300504012080006",
+    "509302070340610008070095400708500031203078950051000000000000300000001200020706000",
+    "010540790084170203000008001000300910000007050091002007040800009000294030030001024",
+    "801506793650000100040100008000005200500700801000031905310067000089000000000208300",
+    "000060020400300005080001007003040900802030014504910083036124500001689040000000000",
+    "008040000000000608070002010000308104000050002560071000351007046080400020600195300",
+    "006002439900006025000030008480000250020500070000423000600000300004368592500004000",
+    "503806701800407203000200006940620100080501090700080000370009020069050410008000600",
+    "400700080080020500075006021001860900000003602030291000008000090020000050900058067",
+    "078000000106302000390050600000000700000086023080700060840007290020090410900820300",
+    "800400001005090000001670003070058906002709005089300024000063000057020000004107609",
+    "000006090900005040052004306000000007073500980098401032000000701400000060016200450",
+    "031500000700018003000307160000000030080701900000956208006100400019200670807690300",
+    "109002630240000000300000000001370040407290068090041007002806410804100070900004006",
+    "000050060740090200602007008020700913100300807000100000200030079007042080300070042",
+    "052870496070002003016093705048030000507010089000958040020100908000000150000000004",
+    "000005238050083000030100506003960001100320009409017000000006000210700083306050400",
+    "045000290000000640090408075070000500150790000000245019017030920500000000000670004",
+]
+GENERATED_HARD_PUZZLES = [
+    "200040008031209004000006010500002000003000905108903460000500070000000080950031206",
+    "000045070050200013009000005180403059000001320203000700004310000000704502000000060",
+    "000090302400000507030501000700000004214900058056000000041320090000004005507000030",
+    "009340705305000204060015000008000950240059807000000026000003008000800090003070000",
+    "005600000008000307700000190002700004900010003060000782030001000001050030086030200",
+    "000006070000000096690020000060039701020400060000000003472580600910000000800090324",
+    "000030000286000700004005090000570003807200000003009802308657209075100000010000600",
+    "090300007040000152007500400800070090000001500100000008026005000000700015500489006",
+    "010068090000001008300900002040703006200004000500002100003007520150820400072000001",
+    "000000600800000030007004028150080400003090000020103700072030000340027050005600000",
+    "030020005600000040540018200000080007273005001008200000009002500000031409000700010",
+    "050006000200900005900470003001800700030000002709304060090708350000000000000562840",
+    "120000000008020000500000006000000740000097005200100800805304002000015008300002409",
+    "100400780080000500050078000000120073001080060005700000600040108010069030028500009",
+    "830006190140008000000004530200000009010003820507000060051600000000080900000030400",
+    "000000070098002100000000506803009760002070409000600085200006000006030290009001004",
+    "000409000005200914090000206213007509080000001507041000000600300048002000000130050",
+    "000001293926700000040900700000000800080009000090682045300090080000070052867000000",
+    "260500007000030800003020040021040508005007300080310094904100000000900051030000080",
+    "800003000007005400300249060100002005098010040002000003470001050209000078600020000",
+]
+# The first 5 generated hard boards with 4 more clues removed -> many solutions
+UNDERCONSTRAINED_PUZZLES = [
+    "200040000031009000000006010500000000003000905108903460000500070000000080950031206",
+    "000045070000200000009000005180403059000001320203000000004310000000704502000000060",
+    "000090300000000507000501000700000000214900058056000000041320090000004005507000030",
+    "009340705305000204000010000008000950040059807000000026000003000000800090003070000",
+    "005600000008000307700000090002700000900000003060000082030001000001050030086030200",
+]
+# Generated Medium boards
+PUZZLES_16X16 = [
+    (
+        "0800507A000D04004D30C60F890E502G0007D2400F0G6000A06C0090002B0130"
+        "07G04A000B0000020520000D90E0174009001007000300G500C00800A2070309"
+        "0204605C0D000G0006BFGD00209C0050GC0A2408001090B00100B73006000000"
+        "70E0A5000C09GF1000050C0400300B008040010200F005730A00000010042D9E"
+    ),
+    (
+        "050134BA00D00C907BE00D0F3A600080ADG00860B020007003060020501FB000"
+        "6AD040180300705004B30A57D08020012C1ED000700630G000806200G0000B04"
+        "E030C00410F00D06CG008000603BF00010F0B706A800003C006A00000G0E17B0"
+        "DE5006004BA00G000690007085E00200GF4003D2C600000BB0A0E000200D0360"
+    ),
+    (
+        "000000210B004F0000C000G010300000B0E74A800DCG610391603E0020408C70"
+        "00D0030560A0E009E00600105000B0DF5470000E3F2DA060300B06F08GE00420"
+        "0D0E0430000009A000G4EF00920000060000A0B00EF025G46B530900010A0E0D"
+        "8E0A9000G0761DF2D0450060081090CEF32C0D00E000G000G000700BC0D00000"
+    ),
+    (
+        "030000A2E0040D0FE04D065002000G000060070G1BD3040E1520D0B0FCG06030"
+        "00A000D6038C00B007D0B000A06900000B00800C5002E0DA00320A4EG00D0700"
+        "0AG5C4000DE00060010023G009A005E800000BE00810AC003070008AC0400020"
+        "00E4G00B0F2091009G010F000A0E00CB0003000000C1FEG00DC0E01300700806"
+    ),
+    (
+        "G20040A10E7300D000300D5080G0B00E074020BE00FDG010ED10386G942BA0C5"
+        "AEF00B000D0231002BC0013475090F00309G0200F8600A4010805000G3B00007"
+        "40090FE00030008CDF000G2000409BA00000908300506E008020B50A00004070"
+        "6C0007000900080001G006080200D000F003C0420AD500009005001B60000000"
+    ),
+]
+PUZZLES_25X25 = [
+    (
+        "60705I12004D0H0C30OEBFG0J00DI0NC0O0EG80001H0073A00HFP000793D60ANO00GJM0CI80"
+        "10O3NA8HGJB0C00000PKD060E000G000E6M003LP8A790H0KN0NO0P40DL032CI00GBM080J109"
+        "06E08GF0000B000O0P50ID030FD090000E083MP1200070LB0000000B0000F000NE40030G00A"
+        "300CM00O4100L0GA0900PH0000K620000AC000000N8M0300B7EC0N0000M7G0P0900K3L08DA0"
+        "J75M0E040F30160P0000C00GK0400P0902ICAN007610BF0M0H00AF000K0HMIJ070E040OPL10"
+        "40MH000708500E00K2AO0I3F0200O0H3A0K000MIN0D80J7PLGA50L70NGFOK8H000031P2BED0"
+        "00000D0J050000LF0004A009000F0D0061EN023ALGB0IK50H001N43OE00BLJ00207F0AG00C0"
+        "BIJ0A6KD00PMFO000EN902800DL0EO00F09A0G0035JB60K4I10P950200C00061008400M0J0B"
+        "KH86C001L070B000PO200A0E0"
+    ),
+    (
+        "24D100000BI0NE0J0K68P9LHGH7OFNI06218A0000094P005D3E09B0L4000015CD0GHIA06MJ0"
+        "000IAK9NP060L005C0000002005000C0000030P0002D000000M0A0G070000009008I1BJ06L2"
+        "00BJ0MN006K0FL7300HO1P94E09N0F0LIGK380067J0P0DHC00D0L47BO09PM02A0C0EN6G3I85"
+        "0PE6H03A4J00DB09FLG0N700K5800J90P02C0G00OBN007I00L1M0OE3J0L5P900200F000D008"
+        "0HPC06FDN0EJ0KBAL40000G010000400B801L7FMED00050J09060LB00M0400H5000J0900N00"
+        "J00E20I1K07B009H5PO08GD6A904P8F000E0D16N030AJIBK00B0HN3DP0600F000000E00479M"
+        "6A5000893M0040PBI000F00NC00K715CGBHAE08064D90OJ03P0G70KP000000000N600DC03FJ"
+        "ND00500400BC0700H0J09O80600C0LG000OHK600401F300E7I0E30ON00I7F50JG820C000B1D"
+        "FI0H60D0C3LN0010000M000G4"
+    ),
+    (
+        "30A0I7C00DE0MJ15KL0N60OP0005D08000M07000AHBO0000G1MJ0000A0000I0OF000100400B"
+        "740H00O300C8LNPE0900502MAEPO1N40FHL200ABG0D0M7IK000569JB0C300DN7L0E8000000O"
+        "FB0N0900DOIEKP0L300007056GM0IAHFLK002O300070B8900C0000KAN0050B08MI009000D0P"
+        "000O2M70P05F0H0NGJD630AKLB140ODH769L5C0E30I0KG00A08IK000LG03B90D0040PAH0010"
+        "0A0GMC00N80P00H7L00E0O0D00203H000410A807DJGCOEK9000C007000OA00G0KM06002800I"
+        "50H0P00D90F06C04A17000BO2I000L00AFH00PB8O0000000ED0OBADL04000K0E000M00030F8"
+        "4020FO05JG70AI0P0EK01MC0H19MC30P80040050B0FL0AGI00OH0200D9L7M4JF005K00B0800"
+        "060M920HA000000F0OID0150G07IFG0J05P80000H0001ON00KL004503O800000A97PEJ000I0"
+        "000000K0EFO1705C00NL0PH00"
+    ),
+    (
+        "0HF20B1N80A0E3G000940O000JA05006I9K007F102030NC00GK00G0DAEH000000N050O08149"
+        "0LO00C00G54H00000J10A7DE00BE4870L000D5N9AG000J602KL60MA0O0E00P052037D0FJ000"
+        "000DHFM002800C06I009GLB7E430BE00000L0O6000002DI0CH001JO00BK0D7M90C0EL0640A0"
+        "700K0LC00AE4HBJ1NFGM0593PG0080K00O0CEN06041J7ID0M0MP09JEH70L0K0GI0O6A000410"
+        "2030L006N0M9P4700BI00AEKF00N0C100IM03DJO009K800LG7EIB7K200AD50100300MNC00OJ"
+        "CDK01809230ILPM00O0A0G764PJAF06IML0N040091H8K00C000200BJ0H00KGC08P60009MA0O"
+        "80G0700O5B90FH040MCEP1IJ3O00IMP7C0F050E0GD200000800M51FN00C0PA00EDB02G000L0"
+        "0063NO0G007L080MA000000900080D052P000000I00E103J0N90J0G0LA40000D500N0F0B80C"
+        "000L4H8000169O0J0053MFG0A"
+    ),
+    (
+        "I0EG49010D7FJ3B2006800K0P0020CJNFL0A0K000E31P7H000710MAKB80PD00E040H90G0J06"
+        "B0L000057M00000NO00K0AEDFO000023E6G40000B7AD019L00HEGJKBI00CM0050910O7A0000"
+        "CL9N2P00H1F00405000G0E6KO00I006000FH90CJLK003NB0086F80O0JK03000L0E20PH0DC1I"
+        "0700M00205ON000I000A0G090EMH075000080300KNC0BD10L0LBD087E0401HIK5A00000MPF0"
+        "00NF0A0B8L0G000M00H0070O00P51900M000JL0AO078DH00000I006D10CH000000P9L0J830A"
+        "8NP000002460001000AL03005K0J000L0MAIDP0H8907000O00D070B0000K9C500031N40F0J0"
+        "060CL1P0F0K00J0D00509000749000850000EONL60KBMPC100P00D5L0HO0BIFGN18ME930004"
+        "N00LHF0P0000479C0D0J000I1001BGC7N50J008300040F002DF8O70G00B05MA1C3LP02E0N6H"
+        "940E00KA18L020D0B0FNCP5M0"
+    ),
+]
+BATCH_SIZE = 2000  # Boards per batch case, each corpus repeated to fill it
+LARGE_BOX_SIZES = (4, 5)  # 16x16 and 25x25 boards
+SOLUTIONS_PER_ENUMERATION = 100  # Same cap as the GUI
+REGRESSION_THRESHOLD = 0.10  # Slower median by more than this is flagged
+
+
+def build_corpora(size: int) -> dict[str, list[list[list[int]]]]:
+    """Parse the first size boards of each difficulty (size // 4 of the others)."""
+    other_size = max(1, size // 4)
+    corpora = {
+        "easy": EASY_PUZZLES[:size],
+        "medium": MEDIUM_PUZZLES[:size],
+        "hard": GENERATED_HARD_PUZZLES[:size],
+        "17-clue": HARD_PUZZLES,
+        "underconstrained": UNDERCONSTRAINED_PUZZLES[:other_size],
+        "16x16": PUZZLES_16X16[:other_size],
+        "25x25": PUZZLES_25X25[:other_size],
+    }
+    return {
+        name: [parse_board(puzzle) for puzzle in puzzles]
+        for name, puzzles in corpora.items()
+    }
+
+
+def _board_size(box_size: int) -> str:
+    return f"{box_size * box_size}x{box_size * box_size}"
+
+
+def _solve_case(strategy: str, propagate: bool):
+    return lambda board: solve(board, strategy, propagate)
+
+
+def _enumerate_case(strategy: str):
+    return lambda board: sum(
+        1 for _ in islice(all_solutions(board, strategy), SOLUTIONS_PER_ENUMERATION)
+    )
+
+
+def build_cases() -> list[tuple[str, str, object]]:
+    """Return (name, corpus, run) triples, run takes a fresh copy of a board."""
+    cases = []
+    for strategy, propagate in (
+        ("row-major", False),
+        ("row-major", True),
+        ("mrv", True),
+        ("dlx", False),
+    ):
+        label = strategy + ("+propagate" if propagate else "")
+        for corpus in ("easy", "medium", "hard", "17-clue"):
+            if corpus == "17-clue" and (strategy, propagate) == ("row-major", False):
+                continue  # Minutes per puzzle
+            cases.append(
+                (f"solve/{label}/{corpus}", corpus, _solve_case(strategy, propagate))
+            )
+
+    for strategy in ("row-major", "mrv", "dlx"):
+        cases.append(
+            (
+                f"all_solutions/{strategy}/underconstrained",
+                "underconstrained",
+                _enumerate_case(strategy),
+            )
+        )
+    cases.append(
+        ("count_solutions/underconstrained", "underconstrained", count_solutions)
+    )
+    cases.append(("has_unique_solution/hard", "hard", has_unique_solution))
+    for corpus in ("hard", "17-clue"):
+        cases.append((f"canonical_form/{corpus}", corpus, canonical_form))
+
+    # Row-major takes minutes per board past 9x9
+    for box_size in LARGE_BOX_SIZES:
+        corpus = _board_size(box_size)
+        for strategy, propagate in (("mrv", True), ("dlx", False), ("dlx", True)):
+            label = strategy + ("+propagate" if propagate else "")
+            cases.append(
+                (f"solve/{label}/{corpus}", corpus, _solve_case(strategy, propagate))
+            )
+        cases.append(
+            (
+                f"count_solutions/{corpus}",
+                corpus,
+                lambda board: count_solutions(board, 2),
+            )
+        )
+    return cases
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[
+        min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    ]
+
+
+def _summarize(latencies: list[float], peak_bytes: int) -> dict[str, float]:
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "median_ms": _percentile(latencies, 0.5) * 1e3,
+        "p95_ms": _percentile(latencies, 0.95) * 1e3,
+        "per_second": len(latencies) / sum(latencies),
+        "peak_kib": peak_bytes / 1024,
+    }
+
+
+def _peak_memory(run, inputs: list) -> int:
+    """Peak traced allocation over 1 pass, kept out of the timed passes."""
+    tracemalloc.start()
+    for args in inputs:
+        run(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(size: int, repeat: int, only: str | None = None) -> dict[str, dict]:
+    corpora = build_corpora(size)
+    results = {}
+
+    for name, corpus, run in build_cases():
+        if only and only not in name:
+            continue
+        latencies = []
+        for _ in range(repeat):
+            for board in corpora[corpus]:
+                board = [row.copy() for row in board]
+                start = time.perf_counter()
+                run(board)
+                latencies.append(time.perf_counter() - start)
+        peak = _peak_memory(
+            run, [([row.copy() for row in board],) for board in corpora[corpus]]
+        )
+        results[name] = _summarize(latencies, peak)
+        _print_row(name, results[name])
+
+    for difficulty in DIFFICULTY_REMOVAL_RANGES:
+        name = f"create_game/{difficulty.lower()}"
+        if only and only not in name:
+            continue
+        random.seed(SEED)
+        latencies = []
+        for _ in range(size * repeat):
+            start = time.perf_counter()
+            create_game(difficulty)
+            latencies.append(time.perf_counter() - start)
+        random.seed(SEED)
+        peak = _peak_memory(create_game, [(difficulty,)] * size)
+        results[name] = _summarize(latencies, peak)
+        _print_row(name, results[name])
+
+    if solve_batch is not None:
+        for corpus in ("easy", "medium", "hard"):
+            boards = (corpora[corpus] * BATCH_SIZE)[:BATCH_SIZE]
+            for name, run in (
+                (f"batch/solve-loop/{corpus}", _solve_loop),
+                (f"batch/solve_batch/{corpus}", solve_batch),
+            ):
+                if only and only not in name:
+                    continue
+                results[name] = _batch_result(run, boards, repeat)
+                _print_row(name, results[name])
+
+    for box_size in LARGE_BOX_SIZES:
+        name = f"create_game/{_board_size(box_size)}-medium"
+        if only and only not in name:
+            continue
+        games = max(1, size // 4)
+        random.seed(SEED)
+        latencies = []
+        for _ in range(games * repeat):
+            start = time.perf_counter()
+            create_game("Medium", box_size=box_size)
+            latencies.append(time.perf_counter() - start)
+        random.seed(SEED)
+        peak = _peak_memory(
+            lambda: create_game("Medium", box_size=box_size), [()] * games
+        )
+        results[name] = _summarize(latencies, peak)
+        _print_row(name, results[name])
+
+    return results
+
+
+def _solve_loop(boards: list[list[list[int]]]) -> None:
+    for board in boards:
+        solve(board, "mrv", True)
+
+
+def _batch_result(run, boards: list[list[list[int]]], repeat: int) -> dict[str, float]:
+    """Latencies of whole batches, but per_second counts boards."""
+    latencies = []
+    for _ in range(repeat):
+        copies = [[row.copy() for row in board] for board in boards]
+        start = time.perf_counter()
+        run(copies)
+        latencies.append(time.perf_counter() - start)
+    peak = _peak_memory(run, [([[row.copy() for row in board] for board in boards],)])
+    result = _summarize(latencies, peak)
+    result["per_second"] = len(boards) * len(latencies) / sum(latencies)
+    return result
+
+
+def _print_row(name: str, result: dict[str, float]) -> None:
+    print(
+        f"{name:45s} median {result['median_ms']:9.3f} ms"
+        f"  p95 {result['p95_ms']:9.3f} ms  {result['per_second']:9.1f}/s"
+        f"  peak {result['peak_kib']:8.1f} KiB",
+        flush=True,
+    )
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """Return the cases whose median got slower than baseline by more than threshold."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median_ms"], result["median_ms"]
+        change = (after - before) / before if before else 0.0
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"{name:45s} {before:9.3f} -> {after:9.3f} ms  {change:+7.1%}  {marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-n", "--size", type=int, default=20, help="boards per difficulty (at most 20)"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="timed passes per case"
+    )
+    parser.add_argument("-k", "--only", help="run cases whose name contains this")
+    parser.add_argument("-o", "--output", help="save results as JSON")
+    parser.add_argument("-c", "--compare", help="JSON results to compare against")
+    parser.add_argument("-t", "--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.size, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "seed": SEED,
+                    "size": args.size,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
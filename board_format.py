@@ -0,0 +1,96 @@
+from itertools import chain
+from math import isqrt
+from cached_board import BOX_SIZES
+
+EMPTY_CHARS = ".0"
+NUM_CHARS = "123456789ABCDEFGHIJKLMNOP"  # Num -> NUM_CHARS[num - 1], up to 25x25
+SIZES = tuple(box_size * box_size for box_size in BOX_SIZES)
+_NUMS = {char: num for num, char in enumerate(NUM_CHARS, start=1)}
+_NUMS.update((char.lower(), num) for char, num in list(_NUMS.items()))
+_NUMS.update((char, 0) for char in EMPTY_CHARS)
+
+
+def parse_board(text: str) -> list[list[int]]:
+    """
+    Parse the standard format, row by row with '0' or '.' for empty cells:
+    81 chars for 9x9, or 16, 256, 625 chars with nums past 9 as letters (A = 10).
+    """
+    text = text.strip()
+    size = isqrt(len(text))
+    if size * size != len(text) or size not in SIZES:
+        raise ValueError("Invalid Board Input")
+
+    nums = []
+    for char in text:
+        num = _NUMS.get(char)
+        if num is None or num > size:
+            raise ValueError("Invalid Board Input")
+        nums.append(num)
+    return [nums[row * size : row * size + size] for row in range(size)]
+
+
+def format_board(board: list[list[int]]) -> str:
+    """Return the standard format (see parse_board), '0' for empty cells."""
+    return "".join(NUM_CHARS[num - 1] if num else "0" for row in board for num in row)
+
+
+def pack_board(board: list[list[int]]) -> bytes:
+    """Return the board as size * size bytes, 1 num per byte (0 for empty cells)."""
+    return bytes(chain.from_iterable(board))
+
+
+def unpack_board(data: bytes) -> list[list[int]]:
+    """Inverse of pack_board."""
+    size = isqrt(len(data))
+    return [list(data[row * size : row * size + size]) for row in range(size)]
+
+
+def encoded_size(size: int = 9) -> int:
+    """Bytes taken by encode_board for a size x size board (41 for 9x9)."""
+    return (size * size * size.bit_length() + 7) // 8
+
+
+def encode_board(board: list[list[int]]) -> bytes:
+    """
+    Return the board in encoded_size(size) bytes: the cells row by row,
+    size.bit_length() bits each (4 for 9x9, 0 for empty), from the highest bit.
+    """
+    size = len(board)
+    bits = size.bit_length()
+    value = 0
+    for num in chain.from_iterable(board):
+        value = (value << bits) | num
+    length = encoded_size(size)
+    return (value << (length * 8 - size * size * bits)).to_bytes(length, "big")
+
+
+def decode_board(data: bytes, size: int = 9) -> list[list[int]]:
+    """Inverse of encode_board."""
+    bits = size.bit_length()
+    cells = size * size
+    value = int.from_bytes(data, "big") >> (len(data) * 8 - cells * bits)
+    mask = (1 << bits) - 1
+    nums = [value >> (bits * (cells - 1 - i)) & mask for i in range(cells)]
+    return [nums[row * size : row * size + size] for row in range(size)]
+
+
+def as_board(puzzle) -> list[list[int]]:
+    """
+    Return a fresh board from a string (see parse_board) or any grid of nums
+    with a size from SIZES, raise ValueError if it is neither.
+    """
+    if isinstance(puzzle, str):
+        return parse_board(puzzle)
+
+    try:
+        board = [list(row) for row in puzzle]
+    except TypeError:  # Not a grid, e.g. None or a number
+        raise ValueError("Invalid Board Input") from None
+    size = len(board)
+    if size not in SIZES or any(
+        len(row) != size
+        or any(not isinstance(num, int) or not 0 <= num <= size for num in row)
+        for row in board
+    ):
+        raise ValueError("Invalid Board Input")
+    return board
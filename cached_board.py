@@ -1,47 +1,166 @@
+from math import isqrt
+
+BOX_SIZES = (2, 3, 4, 5)  # 4x4, 9x9, 16x16, and 25x25 boards
+_box_indexes = {}
+
+
+def box_index(box_size: int) -> list[list[int]]:
+    """Return the box of every cell on a board with box_size x box_size boxes."""
+    if box_size not in _box_indexes:
+        size = box_size * box_size
+        _box_indexes[box_size] = [
+            [(row // box_size) * box_size + col // box_size for col in range(size)]
+            for row in range(size)
+        ]
+    return _box_indexes[box_size]
+
+
+def nums_in(mask: int) -> list[int]:
+    """Return the nums whose bits are set in mask, in ascending order."""
+    nums = []
+    while mask:
+        bit = mask & -mask
+        nums.append(bit.bit_length())
+        mask ^= bit
+    return nums
+
+
 class CachedBoard:
-    def __init__(self, board: list[list[int]] | None = None) -> None:
-        self.board = board if board is not None else [[0] * 9 for _ in range(9)]
+    def __init__(
+        self, board: list[list[int]] | None = None, box_size: int | None = None
+    ) -> None:
+        """box_size defaults to the one implied by board, or 3 (9x9) if empty."""
+        if box_size is None:
+            box_size = isqrt(len(board)) if board is not None else 3
+        if box_size not in BOX_SIZES:
+            raise ValueError("Invalid Board Input")
+        size = box_size * box_size
+        if board is None:
+            board = [[0] * size for _ in range(size)]
+        elif len(board) != size or any(len(row) != size for row in board):
+            raise ValueError("Invalid Board Input")
+
+        self.board = board
+        self.box_size = box_size
+        self.size = size
+        self.all_nums = (1 << size) - 1  # Bit (num - 1) set for every num
+        self.box_index = box_index(box_size)
+        # (row, col, previous num) per change, only recorded while a checkpoint is open
+        self._journal = None
+        self._checkpoints = []
         self._precompute()
 
     def _precompute(self) -> None:
         """Mark empty cells and already filled nums."""
         self.empty_cells = []
-        self._rows = [[False] * 9 for _ in range(9)]
-        self._cols = [[False] * 9 for _ in range(9)]
-        self._boxes = [[[False] * 9 for _ in range(3)] for _ in range(3)]
+        # One bitmask per row, col, and box: bit (num - 1) is set if num is still free
+        self._rows = [self.all_nums] * self.size
+        self._cols = [self.all_nums] * self.size
+        self._boxes = [self.all_nums] * self.size
 
-        for row in range(9):
-            for col in range(9):
+        for row in range(self.size):
+            for col in range(self.size):
                 if not self.board[row][col]:
                     self.empty_cells.append([row, col])
                     continue
 
                 num = self.board[row][col]
+                if not 1 <= num <= self.size:
+                    raise ValueError("Invalid Board Input")
                 # Check if num is already present in its row, col, or box
                 if not self.can_put(num, row, col):
                     raise ValueError("Invalid Board Input")
 
-                self._mark(num, row, col, True)
+                self._take(1 << (num - 1), row, col)
 
-    def _mark(self, num: int, row: int, col: int, flag: bool) -> None:
-        self._rows[row][num - 1] = flag
-        self._cols[col][num - 1] = flag
-        self._boxes[row // 3][col // 3][num - 1] = flag
+    def _take(self, bit: int, row: int, col: int) -> None:
+        self._rows[row] &= ~bit
+        self._cols[col] &= ~bit
+        self._boxes[self.box_index[row][col]] &= ~bit
+
+    def _release(self, bit: int, row: int, col: int) -> None:
+        self._rows[row] |= bit
+        self._cols[col] |= bit
+        self._boxes[self.box_index[row][col]] |= bit
+
+    def candidates(self, row: int, col: int) -> int:
+        """Return the nums that can be put at (row, col) as a bitmask."""
+        return self._rows[row] & self._cols[col] & self._boxes[self.box_index[row][col]]
 
     def can_put(self, num: int, row: int, col: int) -> bool:
-        return not any(
-            (
-                self._rows[row][num - 1],
-                self._cols[col][num - 1],
-                self._boxes[row // 3][col // 3][num - 1],
-            )
+        return bool(
+            (self._rows[row] & self._cols[col] & self._boxes[self.box_index[row][col]])
+            >> (num - 1)
+            & 1
         )
 
     def put(self, num: int, row: int, col: int) -> None:
+        if self._journal is not None:
+            self._record(row, col, num)
         self.board[row][col] = num
-        self._mark(num, row, col, True)
+        self._take(1 << (num - 1), row, col)
 
     def erase(self, row: int, col: int) -> None:
         num = self.board[row][col]
+        if not num:
+            return
+        if self._journal is not None:
+            self._record(row, col, 0)
         self.board[row][col] = 0
-        self._mark(num, row, col, False)
+        self._release(1 << (num - 1), row, col)
+
+    def checkpoint(self) -> tuple[int, int]:
+        """
+        Start recording puts and erases, return a token for rollback or commit.
+        Checkpoints nest (close the innermost first), empty_cells is not tracked.
+        """
+        if self._journal is None:
+            self._journal = []
+        # Depth tells apart checkpoints taken with no change between them
+        token = (len(self._checkpoints), len(self._journal))
+        self._checkpoints.append(token[1])
+        return token
+
+    def rollback(self, token: tuple[int, int]) -> None:
+        """Undo every put and erase since checkpoint token was taken."""
+        self._check_innermost(token)
+        journal = self._journal
+        while len(journal) > token[1]:
+            row, col, num = journal.pop()
+            current_num = self.board[row][col]
+            if current_num:
+                self._release(1 << (current_num - 1), row, col)
+            self.board[row][col] = num
+            if num:
+                self._take(1 << (num - 1), row, col)
+        self._close_checkpoint()
+
+    def commit(self, token: tuple[int, int]) -> None:
+        """Keep the changes since checkpoint token, an outer rollback can undo them."""
+        self._check_innermost(token)
+        self._close_checkpoint()
+
+    def _check_innermost(self, token: tuple[int, int]) -> None:
+        depth, offset = token
+        checkpoints = self._checkpoints
+        if depth != len(checkpoints) - 1 or checkpoints[depth] != offset:
+            raise ValueError("Not the innermost open checkpoint")
+
+    def _close_checkpoint(self) -> None:
+        self._checkpoints.pop()
+        if not self._checkpoints:
+            self._journal = None
+
+    def _record(self, row: int, col: int, new_num: int) -> None:
+        journal = self._journal
+        # A change reverting the last one recorded (after the newest checkpoint)
+        # cancels it, so backtracking searches keep the journal as short as their depth
+        if (
+            len(journal) > self._checkpoints[-1]
+            and journal[-1][0] == row
+            and journal[-1][1] == col
+            and journal[-1][2] == new_num
+        ):
+            journal.pop()
+        else:
+            journal.append((row, col, self.board[row][col]))
@@ -0,0 +1,212 @@
+"""
+Headless command line, never imports pygame.
+    python cli.py solve [FILE]            Solve puzzles line by line (default: stdin)
+    python cli.py generate N [-d Hard]    Print N new 81-char puzzles (-b 4: 16x16)
+    python cli.py generate N -d Easy Hard --bank FILE
+                                          Write N games per difficulty to a bank
+"""
+
+import argparse
+import os
+import sys
+from itertools import islice
+from time import perf_counter
+from board_format import format_board
+from cached_board import BOX_SIZES
+from game_generator import (
+    DIFFICULTY_REMOVAL_RANGES,
+    generate_many,
+    SOLVED_BOARD_METHODS,
+)
+from puzzle_bank import PuzzleBankWriter
+from solver import solve_many, SolveResult, STRATEGIES
+
+BATCH_SIZE = 4096  # Puzzles read and solved together with --batch
+
+
+def _read_puzzles(file, line_numbers: dict[int, int]):
+    """Yield puzzle lines, skip blank and '#' lines, map puzzle index -> line number."""
+    index = 0
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        line_numbers[index] = line_number
+        yield line
+        index += 1
+
+
+def _solve_in_batches(puzzles, solve_batch, args: argparse.Namespace):
+    """Yield a SolveResult per puzzle, BATCH_SIZE puzzles at a time."""
+    first_index = 0
+    while batch := list(islice(puzzles, BATCH_SIZE)):
+        for index, solution, error in solve_batch(
+            batch, args.strategy, not args.no_propagate, args.timeout
+        ):
+            yield SolveResult(first_index + index, solution, error)
+        first_index += len(batch)
+
+
+def solve_command(args: argparse.Namespace) -> int:
+    if args.batch:
+        try:  # Needs numpy, only import it when asked
+            from batch_solver import solve_batch
+        except ImportError as error:
+            print(f"pydoku: --batch: {error}", file=sys.stderr)
+            return 2
+    try:
+        file = open(args.file) if args.file != "-" else sys.stdin
+    except OSError as error:
+        print(f"pydoku: {args.file}: {error.strerror}", file=sys.stderr)
+        return 2
+    line_numbers = {}
+    failed = 0
+    try:
+        puzzles = _read_puzzles(file, line_numbers)
+        if args.batch:
+            results = _solve_in_batches(puzzles, solve_batch, args)
+        else:
+            results = solve_many(
+                puzzles,
+                workers=args.workers,
+                strategy=args.strategy,
+                propagate=not args.no_propagate,
+                timeout=args.timeout,
+            )
+        for index, solution, error in results:
+            line_number = line_numbers.pop(index)
+            if error is not None:
+                print(f"line {line_number}: {error}", file=sys.stderr)
+                failed += 1
+                continue
+            sys.stdout.write(format_board(solution) + "\n")
+            sys.stdout.flush()  # Answer each puzzle before the next is read
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    return 1 if failed else 0
+
+
+def _generate(args: argparse.Namespace):
+    for difficulty in args.difficulty:
+        games = generate_many(
+            difficulty,
+            args.count,
+            workers=args.workers,
+            seed=args.seed,
+            solved_board_method=args.method,
+            box_size=args.box_size,
+        )
+        for clues, solution in games:
+            yield difficulty, clues, solution
+
+
+def generate_command(args: argparse.Namespace) -> int:
+    start = perf_counter()
+    if args.bank is not None:
+        with PuzzleBankWriter(args.bank, args.box_size) as bank:
+            for difficulty, clues, solution in _generate(args):
+                bank.add(difficulty, clues, solution)
+    else:
+        for _, clues, solution in _generate(args):
+            line = format_board(clues)
+            if args.solutions:
+                line += " " + format_board(solution)
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()  # Stream each game as soon as it is ready
+
+    seconds = perf_counter() - start
+    games = args.count * len(args.difficulty)
+    workers = args.workers or os.cpu_count() or 1
+    cores = min(workers, os.cpu_count() or 1)
+    rate = games / seconds if seconds else 0.0
+    print(
+        f"{games} games in {seconds:.2f}s: {rate:.1f} games/s, "
+        f"{rate / cores:.1f} per core (workers: {workers}, cores: {cores})",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="pydoku", description="Headless Sudoku tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    solve_parser = subparsers.add_parser(
+        "solve",
+        help="solve puzzles, one per line: 81 chars ('0' or '.' for empty), "
+        "or 16, 256, 625 chars with letters past 9",
+    )
+    solve_parser.add_argument("file", nargs="?", default="-", help="default: stdin")
+    solve_parser.add_argument(
+        "-s",
+        "--strategy",
+        default="mrv",
+        choices=STRATEGIES,
+    )
+    solve_parser.add_argument(
+        "--no-propagate", action="store_true", help="skip naked/hidden singles"
+    )
+    solve_parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="processes (default: 1)"
+    )
+    solve_parser.add_argument(
+        "-t", "--timeout", type=float, help="give up on a puzzle after SECONDS"
+    )
+    solve_parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=f"put singles in {BATCH_SIZE} puzzles at once with numpy, "
+        "search the rest one by one (in this process)",
+    )
+    solve_parser.set_defaults(handler=solve_command)
+
+    generate_parser = subparsers.add_parser("generate", help="print new puzzles")
+    generate_parser.add_argument("count", type=int)
+    generate_parser.add_argument(
+        "-d",
+        "--difficulty",
+        nargs="+",
+        default=["Easy"],
+        choices=DIFFICULTY_REMOVAL_RANGES,
+        help="N puzzles of each (default: Easy)",
+    )
+    generate_parser.add_argument(
+        "-m", "--method", default="backtracking", choices=SOLVED_BOARD_METHODS
+    )
+    generate_parser.add_argument(
+        "-b",
+        "--box-size",
+        type=int,
+        default=3,
+        choices=BOX_SIZES,
+        help="rows and cols per box (default: 3, 9x9)",
+    )
+    generate_parser.add_argument(
+        "--solutions", action="store_true", help="append the solution to each line"
+    )
+    generate_parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="processes (default: 1)"
+    )
+    generate_parser.add_argument(
+        "--seed",
+        help="generate the same games on every run, whatever the number of workers",
+    )
+    generate_parser.add_argument(
+        "--bank",
+        metavar="FILE",
+        help="write the games and solutions to a puzzle bank instead of stdout",
+    )
+    generate_parser.set_defaults(handler=generate_command)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:  # e.g. piped into head
+        # Silence the failing flush of stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import json
+import os
+from collections import deque
+from time import perf_counter
+
+SLOW_FRAME_MS = 1000 / 60  # Frames over this are kept in the trace
+MAX_SLOW_FRAMES = 1000  # Oldest slow frames are dropped past this
+FPS_WINDOW = 60  # Frames averaged for the overlay
+
+
+class _Stage:
+    def __init__(self, profiler: "FrameProfiler", name: str) -> None:
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._profiler._stages.append((self._name, self._start, perf_counter()))
+
+
+class FrameProfiler:
+    """
+    Time each frame and the named stages inside it, which may nest.
+    Keeps the recent FPS and frame time for an overlay, and the stages of every
+    frame slower than slow_ms for a Chrome trace (chrome://tracing, Perfetto)
+    written to path on close.
+    """
+
+    def __init__(self, path: str, slow_ms: float = SLOW_FRAME_MS) -> None:
+        self._path = path
+        self._slow_seconds = slow_ms / 1000
+        self._origin = perf_counter()
+        self._frame_start = None
+        self._stages = []
+        self._recent = deque(maxlen=FPS_WINDOW)  # (start, busy seconds) per frame
+        self._slow_frames = deque(maxlen=MAX_SLOW_FRAMES)
+        self.frames = 0
+
+    def start_frame(self) -> None:
+        self._frame_start = perf_counter()
+        self._stages = []
+
+    def stage(self, name: str) -> _Stage:
+        """Return a context manager timing name within the current frame."""
+        return _Stage(self, name)
+
+    def end_frame(self) -> None:
+        """End the frame, call it before waiting for the next one."""
+        end = perf_counter()
+        self.frames += 1
+        self._recent.append((self._frame_start, end - self._frame_start))
+        if end - self._frame_start > self._slow_seconds:
+            self._slow_frames.append(
+                (self.frames, self._frame_start, end, self._stages)
+            )
+
+    @property
+    def fps(self) -> float:
+        if len(self._recent) < 2:
+            return 0.0
+        elapsed = self._recent[-1][0] - self._recent[0][0]
+        return (len(self._recent) - 1) / elapsed if elapsed else 0.0
+
+    @property
+    def frame_ms(self) -> tuple[float, float]:
+        """Return the mean and max time spent in the recent frames, in ms."""
+        if not self._recent:
+            return 0.0, 0.0
+        busy = [seconds for _, seconds in self._recent]
+        return sum(busy) / len(busy) * 1000, max(busy) * 1000
+
+    def close(self) -> None:
+        """Write the slow frames as Chrome trace events."""
+        events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"name": "pydoku"},
+            },
+        ]
+        for frame, start, end, stages in self._slow_frames:
+            events.append(self._event("frame", start, end, {"frame": frame}))
+            events.extend(self._event(name, start, end) for name, start, end in stages)
+        with open(self._path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def _event(self, name: str, start: float, end: float, args=None) -> dict:
+        """A complete ("X") event, times in microseconds since the profiler started."""
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": 0,
+        }
+        if args:
+            event["args"] = args
+        return event
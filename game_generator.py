@@ -1,86 +1,270 @@
-from random import shuffle, randint
-from cached_board import CachedBoard
-from solver import solve
+import random
+from cached_board import BOX_SIZES, CachedBoard, nums_in
+from parallel import pool_map
+from puzzle_bank import PuzzleBank
+from solver import count_solutions, has_unique_solution, solve, SolverStats
 
 
+# Cells removed from a 9x9 board, scaled by REMOVAL_SCALES[box_size] for other sizes
 DIFFICULTY_REMOVAL_RANGES = {"Easy": (41, 45), "Medium": (46, 50), "Hard": (51, 55)}
+# Larger boards run out of removable cells sooner than their cell count suggests
+# (about 57 of 81, 162 of 256), and past about 320 of 625 each uniqueness check
+# takes seconds
+REMOVAL_SCALES = {2: 16 / 81, 3: 1, 4: 2.75, 5: 5.5}
+SOLVED_BOARD_METHODS = ("backtracking", "transform")
+# Any valid solved board works, transformations of it are valid too
+SEED_BOARD = [
+    [8, 3, 7, 6, 4, 2, 9, 5, 1],
+    [6, 2, 9, 5, 8, 1, 7, 4, 3],
+    [5, 1, 4, 3, 9, 7, 6, 2, 8],
+    [3, 7, 5, 4, 1, 8, 2, 9, 6],
+    [2, 9, 1, 7, 3, 6, 4, 8, 5],
+    [4, 8, 6, 2, 5, 9, 3, 1, 7],
+    [7, 6, 8, 1, 2, 4, 5, 3, 9],
+    [9, 4, 3, 8, 6, 5, 1, 7, 2],
+    [1, 5, 2, 9, 7, 3, 8, 6, 4],
+]
 
 
-def _create_random_solved_board() -> list[list[int]]:
-    board = CachedBoard()
-    tested = [[[False] * 9 for _ in range(9)] for _ in range(9)]
+def _seed_board(box_size: int) -> list[list[int]]:
+    """Return SEED_BOARD for 9x9, else a solved board following a fixed pattern."""
+    if box_size == 3:
+        return SEED_BOARD
+    size = box_size * box_size
+    return [
+        [
+            ((row % box_size) * box_size + row // box_size + col) % size + 1
+            for col in range(size)
+        ]
+        for row in range(size)
+    ]
+
+
+def _create_random_solved_board(
+    box_size: int = 3, rng: random.Random = random
+) -> list[list[int]]:
+    if box_size > 3:
+        return _create_completed_solved_board(box_size, rng)
+
+    board = CachedBoard(box_size=box_size)
+    size = board.size
+    tested = [0] * (size * size)  # Bitmask of nums already tested at each cell
     i = 0
-    while i < 81:
-        row, col = divmod(i, 9)
-        nums = list(range(1, 10))
-        shuffle(nums)
+    while i < size * size:
+        row, col = divmod(i, size)
 
         if board.board[row][col]:  # Previously tested -> erase previous
             board.erase(row, col)
-            next_row, next_col = divmod(i + 1, 9)
-            tested[next_row][next_col] = [False] * 9
+            tested[i + 1] = 0
 
-        for num in nums:
-            if tested[row][col][num - 1] or not board.can_put(num, row, col):
-                continue
+        nums = nums_in(board.candidates(row, col) & ~tested[i])
+        if nums:
+            num = rng.choice(nums)
             board.put(num, row, col)
-            tested[row][col][num - 1] = True
+            tested[i] |= 1 << (num - 1)
             i += 1
-            break
         else:
             i -= 1
-            continue
 
     return board.board
 
 
-def create_game(difficulty: str) -> tuple[list[list[int]]]:
+def _create_completed_solved_board(
+    box_size: int, rng: random.Random = random
+) -> list[list[int]]:
     """
-    Return an unsolved board and the solution.
-    Difficulty levels:
-        Easy (41 - 45 cells removed)
-        Medium (46 - 50 cells removed)
-        Hard (51 - 55 cells removed)
+    Fill the boxes on the diagonal with random nums (they share no row or col),
+    then let the solver complete the board.
+    Row-major random backtracking thrashes on boards larger than 9x9.
     """
+    size = box_size * box_size
+    board = [[0] * size for _ in range(size)]
+    for box in range(0, size, box_size):
+        nums = list(range(1, size + 1))
+        rng.shuffle(nums)
+        for i, num in enumerate(nums):
+            board[box + i // box_size][box + i % box_size] = num
+    solve(board, strategy="mrv", propagate=True)
+    return board
+
+
+def _shuffled_lines(box_size: int = 3, rng: random.Random = random) -> list[int]:
+    """Return a random order of rows (or cols) that keeps each band (or stack)."""
+    bands = list(range(box_size))
+    rng.shuffle(bands)
+    lines = []
+    for band in bands:
+        within_band = list(range(box_size))
+        rng.shuffle(within_band)
+        lines.extend(band * box_size + line for line in within_band)
+    return lines
 
-    def remove_cell_final() -> None:
-        nonlocal board, row, col, removed
-        board.erase(row, col)
-        board.empty_cells.append([row, col])
-        removed += 1
 
-    solution = _create_random_solved_board()
+def _create_transformed_solved_board(
+    box_size: int = 3, rng: random.Random = random
+) -> list[list[int]]:
+    """
+    Shuffle SEED_BOARD (or the seed board of another size) with transformations
+    that keep a board valid: relabel nums, swap rows/cols within bands/stacks,
+    swap bands/stacks, transpose.
+    """
+    seed_board = _seed_board(box_size)
+    nums = list(range(1, box_size * box_size + 1))
+    rng.shuffle(nums)
+    rows, cols = _shuffled_lines(box_size, rng), _shuffled_lines(box_size, rng)
+    if rng.randint(0, 1):
+        rows, cols = cols, rows
+        return [[nums[seed_board[row][col] - 1] for row in rows] for col in cols]
+    return [[nums[seed_board[row][col] - 1] for col in cols] for row in rows]
+
+
+def _check_options(difficulty: str, solved_board_method: str, box_size: int) -> None:
+    if difficulty not in DIFFICULTY_REMOVAL_RANGES:
+        raise ValueError(f"Unknown difficulty: {difficulty}")
+    if solved_board_method not in SOLVED_BOARD_METHODS:
+        raise ValueError(f"Unknown solved board method: {solved_board_method}")
+    if box_size not in BOX_SIZES:
+        raise ValueError(f"Unsupported box size: {box_size}")
+
+
+class GenerationStats:
+    """Work done by create_game, accumulated over every call it is passed to."""
+
+    def __init__(self) -> None:
+        self.attempts = 0  # Solved boards generated
+        self.solver_calls = 0  # Uniqueness checks run
+        self.solver = SolverStats()  # Totals over those checks
+
+
+def _has_unique_solution(board: CachedBoard, stats: SolverStats | None) -> bool:
+    # Past 9x9, building the Dancing Links matrix pays off over the mrv search
+    if board.box_size > 3:
+        return count_solutions(board, 2, stats) == 1
+    return has_unique_solution(board, stats)
+
+
+def _remove_cells(
+    solution: list[list[int]],
+    num_removal: int,
+    stats: GenerationStats | None,
+    rng: random.Random = random,
+) -> tuple[CachedBoard, int]:
+    """Remove up to num_removal cells such that no other solutions are created."""
     board = CachedBoard([row_contents.copy() for row_contents in solution])
+    solver_stats = stats.solver if stats is not None else None
 
     removed = 0
-    num_removal = randint(*DIFFICULTY_REMOVAL_RANGES[difficulty])
-
-    cells = [[row, col] for row in range(9) for col in range(9)]
-    shuffle(cells)
-    # Remove cells such that no other solutions are created
+    cells = [[row, col] for row in range(board.size) for col in range(board.size)]
+    rng.shuffle(cells)
     for row, col in cells:
         if removed == num_removal:
-            return board.board, solution
+            break
 
         current_num = board.board[row][col]
-        # Try putting other nums at current cell and solve
-        for num in range(1, 10):
-            if num == current_num or not board.can_put(num, row, col):
-                continue
+        token = board.checkpoint()
+        board.erase(row, col)
+        board.empty_cells.append([row, col])
+        # Only current num is valid -> unique solution is guaranteed, else check
+        if board.candidates(row, col) == 1 << (current_num - 1):
+            board.commit(token)
+            removed += 1
+            continue
 
-            board.erase(row, col)
-            board.put(num, row, col)
-            try:
-                solve([row_contents.copy() for row_contents in board.board])
-                break  # Solvable -> different (unwanted) solution
-            except ValueError:
-                pass  # Unsolvable -> unique solution still ensured
-            finally:
-                # Restore board state
-                board.erase(row, col)
-                board.put(current_num, row, col)
-        else:  # Only current num is valid -> unique solution is guaranteed
-            remove_cell_final()
-
-    # If unable to reach the removal target, try again
-    return create_game(difficulty)
+        if stats is not None:
+            stats.solver_calls += 1
+        if _has_unique_solution(board, solver_stats):
+            board.commit(token)
+            removed += 1
+        else:  # Restore board state
+            board.rollback(token)
+            board.empty_cells.pop()
+
+    return board, removed
+
+
+def create_game(
+    difficulty: str,
+    stats: GenerationStats | None = None,
+    solved_board_method: str = "backtracking",
+    box_size: int = 3,
+    bank: PuzzleBank | None = None,
+    rng: random.Random | None = None,
+) -> tuple[list[list[int]]]:
+    """
+    Return an unsolved board and the solution, box_size x box_size boxes (3: 9x9).
+    Difficulty levels (9x9, scaled by REMOVAL_SCALES for other sizes):
+        Easy (41 - 45 cells removed)
+        Medium (46 - 50 cells removed)
+        Hard (51 - 55 cells removed)
+    Solved board methods:
+        backtracking (fill an empty board with random nums, backtrack when stuck;
+            past 9x9, fill the diagonal boxes and complete with the solver)
+        transform (shuffle SEED_BOARD, only yields boards equivalent to it)
+    If bank has games of that difficulty and box size, draw a random one from it
+    instead of generating (stats and solved_board_method don't apply).
+    Every random choice is made with rng (default: the random module), so the same
+    rng state gives the same game.
+    """
+    if rng is None:
+        rng = random
+    if bank is not None and bank.box_size == box_size and bank.count(difficulty):
+        return bank.random_game(difficulty, rng)
+    _check_options(difficulty, solved_board_method, box_size)
+    create_solved_board = (
+        _create_transformed_solved_board
+        if solved_board_method == "transform"
+        else _create_random_solved_board
+    )
+
+    min_removal, max_removal = (
+        int(removal * REMOVAL_SCALES[box_size])
+        for removal in DIFFICULTY_REMOVAL_RANGES[difficulty]
+    )
+    num_removal = rng.randint(min_removal, max_removal)
+
+    while True:
+        if stats is not None:
+            stats.attempts += 1
+        solution = create_solved_board(box_size, rng)
+        board, removed = _remove_cells(solution, num_removal, stats, rng)
+        # Every clue left is needed, settle for any count within the range.
+        # Only start over from a new solved board if even that is out of reach
+        if removed >= min_removal:
+            return board.board, solution
+
+
+def generate_many(
+    difficulty: str,
+    count: int,
+    workers: int | None = None,
+    seed: int | str | None = None,
+    chunksize: int = 4,
+    solved_board_method: str = "backtracking",
+    box_size: int = 3,
+):
+    """
+    Yield count games (unsolved board, solution) of difficulty, in order, generated
+    across a pool of worker processes (default: 1 per CPU, workers=1 generates in
+    this process).
+    Game i is generated with its own random.Random(f"{seed}-{difficulty}-{i}"), so
+    the same seed gives the same games whatever the number of workers
+    (default: a random seed).
+    """
+    _check_options(difficulty, solved_board_method, box_size)
+    if seed is None:
+        seed = random.getrandbits(64)
+    tasks = (
+        (f"{seed}-{difficulty}-{index}", difficulty, solved_board_method, box_size)
+        for index in range(count)
+    )
+    yield from pool_map(_generate_task, tasks, workers, chunksize)
+
+
+def _generate_task(task: tuple) -> tuple[list[list[int]]]:
+    seed, difficulty, solved_board_method, box_size = task
+    return create_game(
+        difficulty,
+        solved_board_method=solved_board_method,
+        box_size=box_size,
+        rng=random.Random(seed),
+    )
@@ -1,14 +1,21 @@
+import os
 import sys
 import pygame
-from game_generator import create_game
+from contextlib import nullcontext
+from puzzle_bank import PuzzleBank
+from puzzle_pool import PuzzlePool
+from board_format import unpack_board
 from cached_board import CachedBoard
-from solver import solve_step_by_step, all_solutions
+from frame_profiler import FrameProfiler
+from solution_finder import SolutionFinder
+from solver import solve, solve_step_by_step
 
 
 WINDOW_WIDTH = 600
 WINDOW_HEIGHT = 700
 GRID_LENGTH = 540
-GRID_SIZE = 9
+BOX_SIZE = 3  # The GUI takes nums from the 1-9 keys, so it stays 9x9
+GRID_SIZE = BOX_SIZE * BOX_SIZE
 CELL_LENGTH = GRID_LENGTH // GRID_SIZE
 GRID_TOPLEFT = ((WINDOW_WIDTH - GRID_LENGTH) // 2, (WINDOW_HEIGHT - GRID_LENGTH) // 2)
 PADDING = 3
@@ -32,7 +39,9 @@ BRIGHT_RED = (205, 74, 73)
 GREEN = (56, 83, 67)
 ERASE_COLOR = (0, 0, 0, 0)
 
-MAX_SOLUTONS = 100
+SOLUTIONS_PAGE_SIZE = 100  # Custom mode solutions found ahead of the one shown
+POOL_DEPTH = 3  # Ready games kept per difficulty
+POOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzle_pool.json")
 DIRECTIONS = {
     pygame.K_UP: (-1, 0),
     pygame.K_DOWN: (1, 0),
@@ -40,6 +49,13 @@ DIRECTIONS = {
     pygame.K_RIGHT: (0, 1),
 }
 ONE_SECOND = 1_000
+WINDOW_RECT = pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+GRID_RECT = pygame.Rect(GRID_TOPLEFT, (GRID_LENGTH, GRID_LENGTH))
+MAX_DIRTY_RECTS = 32  # More than this in a frame -> redraw their bounding box
+STEP_SPEEDS = (1, 4, 16, 64, 256, 1024)  # Step-by-step steps per frame
+DEFAULT_STEP_SPEED = 1  # Index into STEP_SPEEDS
+STEP_TIME_BUDGET = 10  # ms of each 60 FPS frame spent on step-by-step
+PROFILER_OVERLAY_INTERVAL = 30  # Frames between frame profiler overlay updates
 
 
 pygame.init()
@@ -53,13 +69,17 @@ class Button:
         self.label = label
         self.on_click = on_click
         self.is_highlighted = False
+        self._label_texts = {}  # Rendered label per text color
 
     def draw(self, surface: pygame.Surface) -> None:
         color = LIGHT_GRAY if self.is_highlighted else DARKER_BLUE
         pygame.draw.rect(surface, color, self.rect)
 
         text_color = LIGHTER_BLUE if self.is_highlighted else NEAR_WHITE
-        text = self.buttons_font.render(self.label, True, text_color)
+        text = self._label_texts.get(text_color)
+        if text is None:
+            text = self.buttons_font.render(self.label, True, text_color)
+            self._label_texts[text_color] = text
         text_rect = text.get_rect(center=self.rect.center)
         surface.blit(text, text_rect)
 
@@ -69,13 +89,31 @@ class Button:
 
 
 class Grid:
-    def __init__(self) -> None:
+    def __init__(
+        self, profile_path: str | None = None, bank_path: str | None = None
+    ) -> None:
+        """
+        If profile_path is given, time every frame and write slow ones there.
+        If bank_path is given, draw games from that puzzle bank (9x9) when it has
+        some of the difficulty, rather than from the pool.
+        """
+        self._bank = PuzzleBank(bank_path) if bank_path else None
+        if self._bank is not None and self._bank.box_size != BOX_SIZE:
+            raise ValueError("Only 9x9 puzzle banks can be played")
+        self._profiler = FrameProfiler(profile_path) if profile_path else None
+        self._profiler_text_rect = None
         pygame.display.set_caption("Sudoku")
         self._screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 
         self._init_fonts()
+        self._init_glyphs()
         self._init_surfaces()
         self._init_buttons()
+        self._puzzle_pool = PuzzlePool(POOL_DEPTH, POOL_PATH)
+        self._solution_finder = None
+        self._steps = None
+        self._step_speed = DEFAULT_STEP_SPEED
+        self._steps_status_rect = None
 
         self._game_mode = "Easy"
         self._background_surface.fill(DARK_BLUE)
@@ -90,6 +128,26 @@ class Grid:
         self._solutions_count_font = pygame.font.SysFont("ArialBlack", SMALL_FONT_SIZE)
         self._game_over_font = pygame.font.SysFont("ArialBlack", SMALL_FONT_SIZE)
 
+    def _init_glyphs(self) -> None:
+        """Pre-render every grid digit, other texts are cached on first use."""
+        self._rendered_texts = {}
+        for num in range(1, GRID_SIZE + 1):
+            self._glyph(num, NEAR_WHITE)
+        self._clues_layer_key = None
+
+    def _rendered_text(
+        self, font: pygame.font.Font, text: str, color
+    ) -> pygame.Surface:
+        """Return font.render(text) from a cache, for texts drawn over and over."""
+        key = (font, text, color)
+        surface = self._rendered_texts.get(key)
+        if surface is None:
+            surface = self._rendered_texts[key] = font.render(text, True, color)
+        return surface
+
+    def _glyph(self, num: int, color) -> pygame.Surface:
+        return self._rendered_text(self._grid_numbers_font, str(num), color)
+
     def _init_surfaces(self) -> None:
         self._background_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
         self._grid_highlighting_surface = pygame.Surface(
@@ -107,6 +165,15 @@ class Grid:
         self._buttons_surface = pygame.Surface(
             (WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA
         )
+        # Composited bottom to top by _update_display
+        self._layers = (
+            self._background_surface,
+            self._grid_highlighting_surface,
+            self._grid_numbers_surface,
+            self._stats_surface,
+            self._buttons_surface,
+        )
+        self._dirty_rects = [WINDOW_RECT]
 
     def _init_buttons(self) -> None:
         self._buttons = []
@@ -132,24 +199,33 @@ class Grid:
         self._buttons.extend([_show_solution, solve_step_by_step])
 
     def _start_new_game(self) -> None:
+        self._close_solution_finder()
+        if self._steps is not None:
+            self._steps.close()  # Its board is discarded with the game
+            self._steps = None
+            self._draw_steps_status()
         self._grid_numbers_surface.fill(ERASE_COLOR)
         self._stats_surface.fill(ERASE_COLOR)
+        self._dirty_rects.append(WINDOW_RECT)
         self._grid_locked = False
 
         if self._game_mode == "Custom":
-            grid_rect = pygame.Rect(
-                GRID_TOPLEFT[0], GRID_TOPLEFT[1], GRID_LENGTH, GRID_LENGTH
-            )
-            self._grid_highlighting_surface.fill(DARKER_BLUE, grid_rect)
+            self._grid_highlighting_surface.fill(DARKER_BLUE, GRID_RECT)
 
             self._cached_board = CachedBoard()
             self._board = self._cached_board.board
             self._clues = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
             self._solution = []
-            self._solutions = []
+            self._solutions = []  # Packed with pack_board, 81 bytes each
             self._current_solution_index = 0
+            self._solutions_message_rect = None
         else:
-            self._clues, self._solution = create_game(self._game_mode)
+            with self._stage("generate"):  # Only slow if the pool ran dry
+                if self._bank is not None and self._bank.count(self._game_mode):
+                    game = self._bank.random_game(self._game_mode)
+                else:
+                    game = self._puzzle_pool.pop(self._game_mode)
+                self._clues, self._solution = game
             self._board = [row.copy() for row in self._clues]
 
             self._total_seconds = 0
@@ -175,7 +251,7 @@ class Grid:
 
     def _draw_inner_grid_lines(self) -> None:
         for i in range(1, GRID_SIZE):
-            thickness = THICK_THICKNESS if i % 3 == 0 else THIN_THICKNESS
+            thickness = THICK_THICKNESS if i % BOX_SIZE == 0 else THIN_THICKNESS
             pygame.draw.line(
                 self._buttons_surface,
                 LIGHT_BLUE,
@@ -260,9 +336,12 @@ class Grid:
         self._selected_row = self._selected_col = None
 
     def _selected_cell_rect(self) -> pygame.Rect:
+        return self._cell_rect(self._selected_row, self._selected_col)
+
+    def _cell_rect(self, row: int, col: int) -> pygame.Rect:
         return pygame.Rect(
-            GRID_TOPLEFT[0] + self._selected_col * CELL_LENGTH,
-            GRID_TOPLEFT[1] + self._selected_row * CELL_LENGTH,
+            GRID_TOPLEFT[0] + col * CELL_LENGTH,
+            GRID_TOPLEFT[1] + row * CELL_LENGTH,
             CELL_LENGTH,
             CELL_LENGTH,
         )
@@ -270,6 +349,7 @@ class Grid:
     def _highlight_selected(self, color) -> None:
         rect = self._selected_cell_rect()
         pygame.draw.rect(self._grid_highlighting_surface, color, rect)
+        self._dirty_rects.append(rect)
 
     def _selected_is_clue(self):
         return self._clues[self._selected_row][self._selected_col]
@@ -281,7 +361,7 @@ class Grid:
         return self._solution[self._selected_row][self._selected_col]
 
     def _draw_number_at_selected(self, num: int) -> None:
-        text = self._grid_numbers_font.render(str(num), True, NEAR_WHITE)
+        text = self._glyph(num, NEAR_WHITE)
         text_rect = text.get_rect(
             center=(
                 GRID_TOPLEFT[0] + self._selected_col * CELL_LENGTH + CELL_LENGTH // 2,
@@ -289,26 +369,51 @@ class Grid:
             )
         )
         self._grid_numbers_surface.blit(text, text_rect)
+        self._dirty_rects.append(text_rect)
 
     def _display_clues(self) -> None:
+        """Draw the clues over the whole grid, clearing every other cell."""
+        self._selected_row = self._selected_col = None
+        clues_key = tuple(map(tuple, self._clues))
+        if clues_key != self._clues_layer_key:
+            self._render_clues_layer()
+            self._clues_layer_key = clues_key
+
+        self._grid_highlighting_surface.blit(self._clues_highlighting, GRID_RECT)
+        self._grid_numbers_surface.fill(ERASE_COLOR, GRID_RECT)
+        # Adding onto the cleared (all zero) area copies the layer as is
+        self._grid_numbers_surface.blit(
+            self._clues_numbers, GRID_RECT, special_flags=pygame.BLEND_RGBA_ADD
+        )
+        self._dirty_rects.append(GRID_RECT)
+
+    def _render_clues_layer(self) -> None:
+        """Render the grid's highlighting and numbers for the current clues once."""
+        self._clues_highlighting = pygame.Surface(GRID_RECT.size)
+        self._clues_highlighting.fill(DARKER_BLUE)
+        self._clues_numbers = pygame.Surface(GRID_RECT.size, pygame.SRCALPHA)
         for row in range(GRID_SIZE):
             for col in range(GRID_SIZE):
                 clue = self._clues[row][col]
-                self._select_cell(row, col)
                 if not clue:
-                    self._highlight_selected(DARKER_BLUE)
-                else:
-                    self._draw_number_at_selected(clue)
-                self._unselect_selected()
+                    continue
+                cell_rect = pygame.Rect(
+                    col * CELL_LENGTH, row * CELL_LENGTH, CELL_LENGTH, CELL_LENGTH
+                )
+                self._clues_highlighting.fill(DARK_BLUE, cell_rect)
+                glyph = self._glyph(clue, NEAR_WHITE)
+                self._clues_numbers.blit(glyph, glyph.get_rect(center=cell_rect.center))
 
     def _draw_buttons(self) -> None:
         for button in self._buttons:
             button.is_highlighted = button.label == self._game_mode
             button.draw(self._buttons_surface)
+            self._dirty_rects.append(button.rect)
 
     def _draw_timer(self) -> None:
         if self._total_seconds > 0:
             self._stats_surface.fill(DARK_BLUE, self._timer_text_rect)
+            self._dirty_rects.append(self._timer_text_rect)
 
         minutes, seconds = divmod(self._total_seconds, 60)
         timer_text = self._timer_font.render(
@@ -318,18 +423,20 @@ class Grid:
             bottomleft=(GRID_TOPLEFT[0] + THICK_THICKNESS, GRID_TOPLEFT[1] - PADDING)
         )
         self._stats_surface.blit(timer_text, self._timer_text_rect)
+        self._dirty_rects.append(self._timer_text_rect)
 
     def _draw_lives(self) -> None:
         if self._lives < 3:
             self._stats_surface.fill(DARK_BLUE, self._lives_text_rect)
+            self._dirty_rects.append(self._lives_text_rect)
 
         if not self._lives:
             text_content = "Game Over"
-            text = self._game_over_font.render(text_content, True, BRIGHT_RED)
+            text = self._rendered_text(self._game_over_font, text_content, BRIGHT_RED)
             self._grid_locked = True
         else:
             text_content = "♥" * self._lives
-            text = self._lives_font.render(text_content, True, BRIGHT_RED)
+            text = self._rendered_text(self._lives_font, text_content, BRIGHT_RED)
 
         self._lives_text_rect = text.get_rect(
             bottomright=(
@@ -338,29 +445,73 @@ class Grid:
             )
         )
         self._stats_surface.blit(text, self._lives_text_rect)
+        self._dirty_rects.append(self._lives_text_rect)
 
     def main_loop(self):
         clock = pygame.time.Clock()
         while True:
+            if self._profiler is not None:
+                self._profiler.start_frame()
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self._close_solution_finder()
+                    self._puzzle_pool.close()
+                    if self._bank is not None:
+                        self._bank.close()
+                    if self._profiler is not None:
+                        self._profiler.close()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self._handle_mouse_click(*event.pos)
+                    with self._stage("click"):
+                        self._handle_mouse_click(*event.pos)
                 elif event.type == pygame.KEYDOWN:
-                    self._handle_key_press(event.key)
+                    with self._stage(f"key {pygame.key.name(event.key)}"):
+                        self._handle_key_press(event.key)
 
             if not self._grid_locked and self._game_mode != "Custom":
                 current_time = pygame.time.get_ticks()
                 if current_time - self._last_time >= ONE_SECOND:
                     self._total_seconds += 1
                     self._last_time = current_time
-                    self._draw_timer()
-
-            self._update_display()
+                    with self._stage("timer"):
+                        self._draw_timer()
+            with self._stage("solution finder"):
+                self._update_solution_finder()
+            with self._stage("step-by-step"):
+                self._advance_steps()
+
+            if self._profiler is not None:
+                self._draw_profiler_overlay()
+            with self._stage("display"):
+                self._update_display()
+            if self._profiler is not None:
+                self._profiler.end_frame()
             clock.tick(60)
 
+    def _stage(self, name: str):
+        """Time the with block as a stage of the frame when profiling."""
+        return nullcontext() if self._profiler is None else self._profiler.stage(name)
+
+    def _draw_profiler_overlay(self) -> None:
+        """Draw FPS and mean / max frame time at the top left every few frames."""
+        if self._profiler.frames % PROFILER_OVERLAY_INTERVAL:
+            return
+        if self._profiler_text_rect is not None:
+            self._stats_surface.fill(ERASE_COLOR, self._profiler_text_rect)
+            self._dirty_rects.append(self._profiler_text_rect)
+
+        mean_ms, max_ms = self._profiler.frame_ms
+        text = self._timer_font.render(
+            f"{self._profiler.fps:.0f} FPS {mean_ms:.1f}/{max_ms:.1f} ms",
+            True,
+            LIGHTER_BLUE,
+        )
+        self._profiler_text_rect = text.get_rect(topleft=(PADDING, PADDING))
+        self._stats_surface.blit(text, self._profiler_text_rect)
+        self._dirty_rects.append(self._profiler_text_rect)
+
     def _handle_mouse_click(self, x: float, y: float) -> None:
         row = (y - GRID_TOPLEFT[1]) // CELL_LENGTH
         col = (x - GRID_TOPLEFT[0]) // CELL_LENGTH
@@ -374,18 +525,23 @@ class Grid:
 
         for button in self._buttons:
             if button.rect.collidepoint(x, y):
-                button.handle_click()
+                with self._stage(f"button {button.label}"):
+                    button.handle_click()
                 return
 
     def _handle_key_press(self, key_pressed) -> None:
-        if (
-            self._game_mode == "Custom"
-            and self._solutions
-            and key_pressed in {pygame.K_LEFT, pygame.K_RIGHT}
-        ):
-            self._handle_solutions_navigation(key_pressed)
+        if self._steps is not None:
+            self._handle_steps_key_press(key_pressed)
             return
 
+        if self._game_mode == "Custom" and self._solution_finder is not None:
+            if key_pressed == pygame.K_ESCAPE:
+                self._solution_finder.cancel()
+                return
+            if self._solutions and key_pressed in {pygame.K_LEFT, pygame.K_RIGHT}:
+                self._handle_solutions_navigation(key_pressed)
+                return
+
         if self._grid_locked:
             return
 
@@ -406,14 +562,15 @@ class Grid:
             self._select_cell(row, col)
 
     def _handle_solutions_navigation(self, key_pressed) -> None:
-        if key_pressed == pygame.K_LEFT and self._current_solution_index > 0:
-            self._current_solution_index -= 1
-        elif key_pressed == pygame.K_RIGHT and self._current_solution_index < len(
-            self._solutions
-        ):
-            self._current_solution_index += 1
-
-        self._solution = self._solutions[self._current_solution_index]
+        index = self._current_solution_index
+        if key_pressed == pygame.K_LEFT and index > 0:
+            index -= 1
+        elif key_pressed == pygame.K_RIGHT and index + 1 < len(self._solutions):
+            index += 1
+
+        self._solution_finder.want(index + 1 + SOLUTIONS_PAGE_SIZE)
+        self._current_solution_index = index
+        self._solution = unpack_board(self._solutions[index])
         self._show_solution()
 
     def _put_at_selected(self, num: int) -> None:
@@ -456,7 +613,7 @@ class Grid:
             self._board[self._selected_row][self._selected_col] = 0
         rect = self._selected_cell_rect()
         pygame.draw.rect(self._grid_numbers_surface, ERASE_COLOR, rect)
-        self._highlight_selected(LIGHT_GRAY)
+        self._highlight_selected(LIGHT_GRAY)  # Marks rect dirty
 
     def _get_empty_cells(self) -> list[list[int]]:
         return [
@@ -466,50 +623,107 @@ class Grid:
             if not self._board[row][col]
         ]
 
-    def _load_all_solutions(self) -> None:
+    def _start_solution_finder(self) -> None:
+        """Start enumerating solutions on a background thread."""
         self._clues = [row.copy() for row in self._board]
         self._cached_board.empty_cells = self._get_empty_cells()
 
-        for solution in all_solutions(self._cached_board):
-            self._solutions.append([row.copy() for row in solution])
-            if len(self._solutions) == MAX_SOLUTONS:
-                break
+        self._solution_finder = SolutionFinder(self._clues, SOLUTIONS_PAGE_SIZE)
+        self._solutions = self._solution_finder.solutions
+        self._solution_finder_progress = None
+
+    def _update_solution_finder(self) -> None:
+        """Show the background search's progress, called every frame."""
+        finder = self._solution_finder
+        if finder is None or self._steps is not None:
+            return
+        progress = (len(finder.solutions), finder.searching, finder.done)
+        if progress == self._solution_finder_progress:
+            return
+        self._solution_finder_progress = progress
+
+        if self._solution:
+            self._display_solutions_count()
+        elif finder.solutions:
+            self._show_solution()  # The 1st one arrived
+        elif finder.done:
+            self._display_solutions_message(
+                "No Solution" if finder.complete else "Cancelled"
+            )
+            self._solution_finder = None
+            self._grid_locked = False  # Let the board be fixed
+            self._select_first_empty_cell()
+        else:
+            self._display_solutions_message("Searching... (Esc to cancel)")
+
+    def _close_solution_finder(self) -> None:
+        if self._solution_finder is not None:
+            self._solution_finder.cancel()
+        self._solution_finder = None
 
     def _display_solutions_count(self) -> None:
-        count = len(self._solutions)
-        text = (
-            f"{count} Solutions < | >"
-            if count < MAX_SOLUTONS
-            else f"{MAX_SOLUTONS}+ Solutions < | >"
-        )
+        finder = self._solution_finder
+        count = len(finder.solutions)
+        if count == 1 and finder.complete:  # Unique, clear "Searching..." instead
+            if self._solutions_message_rect is not None:
+                self._stats_surface.fill(ERASE_COLOR, self._solutions_message_rect)
+                self._dirty_rects.append(self._solutions_message_rect)
+                self._solutions_message_rect = None
+            return
+        position = f"{self._current_solution_index + 1} of {count}"
+        if finder.searching:
+            self._display_solutions_message(f"{position} found... (Esc to cancel)")
+        else:
+            more = "" if finder.complete else "+"
+            self._display_solutions_message(f"{position}{more} Solutions < | >")
+
+    def _display_solutions_message(self, text: str) -> None:
         solutions_count_text = self._solutions_count_font.render(text, True, BRIGHT_RED)
         solutions_count_rect = solutions_count_text.get_rect(
             bottomleft=(GRID_TOPLEFT[0] + THICK_THICKNESS, GRID_TOPLEFT[1] - PADDING)
         )
+        if self._solutions_message_rect is not None:
+            self._stats_surface.fill(ERASE_COLOR, self._solutions_message_rect)
+            self._dirty_rects.append(self._solutions_message_rect)
         self._stats_surface.blit(solutions_count_text, solutions_count_rect)
+        self._dirty_rects.append(solutions_count_rect)
+        self._solutions_message_rect = solutions_count_rect
 
     def _show_solution(self) -> None:
+        if self._steps is not None:
+            self._finish_steps(skip=True)
+            return
         self._grid_locked = True
         self._unselect_selected()
 
         if not self._solution:
-            self._load_all_solutions()
-            if len(self._solutions) > 1:
-                self._display_solutions_count()
+            if self._solution_finder is None:
+                self._start_solution_finder()
+            if not self._solutions:
+                return  # Shown by _update_solution_finder once found
 
-            self._solution = self._solutions[self._current_solution_index]
+            self._solution = unpack_board(self._solutions[0])
+        if self._game_mode == "Custom" and self._solutions:
+            self._display_solutions_count()
 
         self._grid_numbers_surface.fill(ERASE_COLOR)
-        self._display_clues()
+        self._display_clues()  # Marks the whole grid dirty
         for row in range(GRID_SIZE):
             for col in range(GRID_SIZE):
                 if self._clues[row][col]:
                     continue
-                self._select_cell(row, col)
-                self._draw_number_at_selected(self._solution_at_selected())
-                self._highlight_selected(GREEN)
+                rect = self._cell_rect(row, col)
+                self._grid_highlighting_surface.fill(GREEN, rect)
+                glyph = self._glyph(self._solution[row][col], NEAR_WHITE)
+                self._grid_numbers_surface.blit(
+                    glyph, glyph.get_rect(center=rect.center)
+                )
 
     def _solve_step_by_step(self) -> None:
+        """Start the visualization, main_loop then advances it every frame."""
+        if self._steps is not None:
+            return
+        self._steps_were_locked = self._grid_locked
         self._grid_locked = True
 
         if not self._solution:
@@ -519,29 +733,152 @@ class Grid:
         else:
             board = CachedBoard([row.copy() for row in self._clues])
 
+        self._unselect_selected()
         self._grid_numbers_surface.fill(ERASE_COLOR)
         self._display_clues()
 
-        for instruction, args in solve_step_by_step(board):
-            if instruction == "Select":
-                self._unselect_selected()
-                self._select_cell(*args)
-            elif instruction == "Erase":
-                rect = self._selected_cell_rect()
-                self._grid_numbers_surface.fill(ERASE_COLOR, rect)
-                self._highlight_selected(LIGHT_GRAY)
-            else:
-                self._draw_number_at_selected(*args)
+        self._steps_board = board
+        self._steps_checkpoint = board.checkpoint()  # To undo a skip or cancel
+        self._steps = solve_step_by_step(board)
+        self._steps_paused = False
+        self._draw_steps_status()
 
-            self._update_display()
+    def _advance_steps(self) -> None:
+        """Apply up to STEP_SPEEDS[speed] steps within STEP_TIME_BUDGET."""
+        if self._steps is None or self._steps_paused:
+            return
 
-        self._solution = board.board
+        end_time = pygame.time.get_ticks() + STEP_TIME_BUDGET
+        for _ in range(STEP_SPEEDS[self._step_speed]):
+            try:
+                step = next(self._steps, None)
+            except ValueError:  # No Solution, the board is back to its clues
+                step = None
+            if step is None:
+                self._finish_steps()
+                return
+            self._draw_step(*step)
+            if pygame.time.get_ticks() >= end_time:
+                return
+
+    def _draw_step(self, instruction: str, args: tuple) -> None:
+        if instruction == "Select":
+            self._unselect_selected()
+            self._select_cell(*args)
+        elif instruction == "Erase":
+            rect = self._selected_cell_rect()
+            self._grid_numbers_surface.fill(ERASE_COLOR, rect)
+            self._highlight_selected(LIGHT_GRAY)
+        else:
+            self._draw_number_at_selected(*args)
+
+    def _handle_steps_key_press(self, key_pressed) -> None:
+        if key_pressed == pygame.K_SPACE:
+            self._steps_paused = not self._steps_paused
+        elif key_pressed == pygame.K_UP:
+            self._step_speed = min(self._step_speed + 1, len(STEP_SPEEDS) - 1)
+        elif key_pressed == pygame.K_DOWN:
+            self._step_speed = max(self._step_speed - 1, 0)
+        elif key_pressed == pygame.K_RETURN:
+            self._finish_steps(skip=True)
+            return
+        elif key_pressed == pygame.K_ESCAPE:
+            self._cancel_steps()
+            return
+        self._draw_steps_status()
+
+    def _finish_steps(self, skip: bool = False) -> None:
+        """Show the solution, skip jumps to it without playing the remaining steps."""
+        board = self._steps_board
+        if skip:
+            self._steps.close()
+            board.rollback(self._steps_checkpoint)
+            if not self._solution:
+                try:
+                    with self._stage("solve"):
+                        solve(board, "dlx")
+                except ValueError:
+                    pass
+        else:
+            board.commit(self._steps_checkpoint)
+        self._stop_steps()
+
+        if not self._solution:
+            if any(not num for row in board.board for num in row):
+                self._display_solutions_message("No Solution")
+                self._grid_locked = False  # Let the board be fixed
+                self._select_first_empty_cell()
+                return
+            self._solution = board.board
         self._show_solution()
 
+    def _cancel_steps(self) -> None:
+        """Undo the steps played so far and go back to the board as it was."""
+        self._steps.close()
+        self._steps_board.rollback(self._steps_checkpoint)
+        self._stop_steps()
+
+        if self._steps_were_locked and self._solution:
+            self._show_solution()
+            return
+        self._grid_locked = self._steps_were_locked
+        self._grid_numbers_surface.fill(ERASE_COLOR)
+        self._display_clues()
+        for row in range(GRID_SIZE):
+            for col in range(GRID_SIZE):
+                num = self._board[row][col]
+                if self._clues[row][col] or not num:
+                    continue
+                self._select_cell(row, col)
+                self._draw_number_at_selected(num)
+                self._highlight_selected(
+                    GREEN if num == self._solution_at_selected() else RED
+                )
+                self._unselect_selected()
+        if not self._grid_locked:
+            self._select_first_empty_cell()
+
+    def _stop_steps(self) -> None:
+        self._steps = None
+        self._unselect_selected()
+        self._draw_steps_status()
+        self._solution_finder_progress = None  # Let it redraw its message
+
+    def _draw_steps_status(self) -> None:
+        """Draw the step-by-step controls under the buttons, erase them once done."""
+        if self._steps_status_rect is not None:
+            self._stats_surface.fill(ERASE_COLOR, self._steps_status_rect)
+            self._dirty_rects.append(self._steps_status_rect)
+            self._steps_status_rect = None
+        if self._steps is None:
+            return
+
+        speed = (
+            "Paused"
+            if self._steps_paused
+            else f"{STEP_SPEEDS[self._step_speed]} steps/frame"
+        )
+        text = self._timer_font.render(
+            f"{speed} (Up/Down)   Space: pause   Enter: skip   Esc: cancel",
+            True,
+            NEAR_WHITE,
+        )
+        self._steps_status_rect = text.get_rect(
+            midbottom=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - PADDING)
+        )
+        self._stats_surface.blit(text, self._steps_status_rect)
+        self._dirty_rects.append(self._steps_status_rect)
+
     def _update_display(self) -> None:
-        self._screen.blit(self._background_surface, (0, 0))
-        self._screen.blit(self._grid_highlighting_surface, (0, 0))
-        self._screen.blit(self._grid_numbers_surface, (0, 0))
-        self._screen.blit(self._stats_surface, (0, 0))
-        self._screen.blit(self._buttons_surface, (0, 0))
-        pygame.display.flip()
+        """Composite and show only the regions drawn on since the last call."""
+        rects = self._dirty_rects
+        if not rects:
+            return
+        self._dirty_rects = []
+        if len(rects) > MAX_DIRTY_RECTS:
+            rects = [rects[0].unionall(rects[1:])]
+
+        for rect in rects:
+            for layer in self._layers:
+                self._screen.blit(layer, rect, rect)
+        pygame.display.update(rects)
@@ -1,8 +1,22 @@
+import argparse
 from grid_gui import Grid
 
 
 def main():
-    grid = Grid()
+    parser = argparse.ArgumentParser(description="Sudoku")
+    parser.add_argument(
+        "--profile",
+        metavar="TRACE",
+        help="show FPS and frame time, write slow frames to TRACE (Chrome trace JSON)",
+    )
+    parser.add_argument(
+        "--bank",
+        metavar="FILE",
+        help="draw games from a puzzle bank (see cli.py generate --bank)",
+    )
+    args = parser.parse_args()
+
+    grid = Grid(args.profile, args.bank)
     grid.main_loop()
 
 
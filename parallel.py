@@ -0,0 +1,45 @@
+import os
+from threading import Semaphore
+
+
+def pool_map(
+    function,
+    tasks,
+    workers: int | None = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+):
+    """
+    Yield function(task) for every task, computed across a pool of worker processes
+    (default: 1 per CPU, workers=1 runs in this process), in task order or as they
+    complete. function must be picklable (defined at module level).
+    Tasks are read as results are consumed, a few chunks per worker ahead, so memory
+    stays flat and a slow task never keeps the other workers waiting.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(function, tasks)
+        return
+
+    from multiprocessing import Pool  # Only pay for it when actually used
+
+    in_flight = Semaphore(workers * chunksize * 4)
+    stopped = False
+
+    def throttled_tasks():  # Iterated by the pool's feeder thread
+        for task in tasks:
+            in_flight.acquire()
+            if stopped:
+                return
+            yield task
+
+    with Pool(workers) as pool:
+        map_tasks = pool.imap if ordered else pool.imap_unordered
+        try:
+            for result in map_tasks(function, throttled_tasks(), chunksize):
+                in_flight.release()
+                yield result
+        finally:
+            # Wake the feeder thread if it is waiting, or closing the pool hangs
+            stopped = True
+            in_flight.release()
@@ -0,0 +1,179 @@
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from board_format import decode_board, encode_board, encoded_size
+
+MAGIC = b"PYDKBANK"
+VERSION = 1
+# Magic, version, box size, record size, record count, index offset.
+# Then fixed-size records: difficulty id (1 byte), clues, solution (encode_board).
+# Then the index, per difficulty in id order: name length (1 byte), name,
+# record count (4 bytes), and the number of every record of that difficulty
+_HEADER = struct.Struct("<8sBBHIQ")
+_COUNT = struct.Struct("<I")
+
+
+class PuzzleBankWriter:
+    """
+    Write games to a new puzzle bank file one at a time, so any number can be
+    streamed in. The file only replaces path once closed.
+    """
+
+    def __init__(self, path: str, box_size: int = 3) -> None:
+        self.box_size = box_size
+        self._path = path
+        self._temp_path = path + ".tmp"
+        self._size = box_size * box_size
+        self._record_size = 1 + 2 * encoded_size(self._size)
+        self._ids = {}  # Difficulty -> id
+        self._records = {}  # Difficulty -> record numbers
+        self._count = 0
+        self._file = open(self._temp_path, "wb")
+        self._file.write(bytes(_HEADER.size))  # Written on close
+
+    def __enter__(self) -> "PuzzleBankWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:  # Leave any previous file at path untouched
+            self._file.close()
+            os.remove(self._temp_path)
+
+    def add(
+        self, difficulty: str, clues: list[list[int]], solution: list[list[int]]
+    ) -> None:
+        if len(clues) != self._size or len(solution) != self._size:
+            raise ValueError("Invalid Board Input")
+        if difficulty not in self._ids:
+            if len(self._ids) == 256:
+                raise ValueError("Too many difficulties")
+            self._ids[difficulty] = len(self._ids)
+            self._records[difficulty] = array("I")
+        self._file.write(
+            bytes((self._ids[difficulty],))
+            + encode_board(clues)
+            + encode_board(solution)
+        )
+        self._records[difficulty].append(self._count)
+        self._count += 1
+
+    def close(self) -> None:
+        index_offset = self._file.tell()
+        for difficulty, records in self._records.items():
+            name = difficulty.encode()
+            self._file.write(bytes((len(name),)) + name + _COUNT.pack(len(records)))
+            if sys.byteorder == "big":
+                records.byteswap()
+            self._file.write(records.tobytes())
+        self._file.seek(0)
+        self._file.write(
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                self.box_size,
+                self._record_size,
+                self._count,
+                index_offset,
+            )
+        )
+        self._file.close()
+        os.replace(self._temp_path, self._path)
+
+
+class PuzzleBank:
+    """
+    Read a puzzle bank file (see PuzzleBankWriter) through mmap: only the index
+    header of each difficulty is read up front, games are decoded one at a time.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_index()
+        except (ValueError, struct.error, UnicodeDecodeError):
+            self._map.close()
+            raise ValueError(f"Not a puzzle bank file: {path}") from None
+
+    def _read_index(self) -> None:
+        (
+            magic,
+            version,
+            box_size,
+            record_size,
+            count,
+            index_offset,
+        ) = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError
+        self.box_size = box_size
+        self._size = box_size * box_size
+        self._record_size = record_size
+        self._count = count
+        if _HEADER.size + count * record_size != index_offset:
+            raise ValueError
+
+        self._difficulties = {}  # Difficulty -> (offset of record numbers, count)
+        offset = index_offset
+        while offset < len(self._map):
+            name_length = self._map[offset]
+            name = self._map[offset + 1 : offset + 1 + name_length].decode()
+            offset += 1 + name_length
+            (records,) = _COUNT.unpack_from(self._map, offset)
+            offset += _COUNT.size
+            self._difficulties[name] = (offset, records)
+            offset += records * _COUNT.size
+        if offset != len(self._map):
+            raise ValueError
+
+    def __enter__(self) -> "PuzzleBank":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def difficulties(self) -> list[str]:
+        return list(self._difficulties)
+
+    def count(self, difficulty: str) -> int:
+        """Return the number of games of difficulty, 0 if there are none."""
+        return self._difficulties.get(difficulty, (0, 0))[1]
+
+    def game(self, difficulty: str, index: int) -> tuple[list[list[int]]]:
+        """Return the clues and solution of the index-th game of difficulty."""
+        offset, records = self._difficulties.get(difficulty, (0, 0))
+        if not 0 <= index < records:
+            raise IndexError(f"No {difficulty} game {index} in the bank")
+        (record,) = _COUNT.unpack_from(self._map, offset + index * _COUNT.size)
+        start = _HEADER.size + record * self._record_size + 1
+        board_size = (self._record_size - 1) // 2
+        return (
+            decode_board(self._map[start : start + board_size], self._size),
+            decode_board(
+                self._map[start + board_size : start + 2 * board_size], self._size
+            ),
+        )
+
+    def random_game(
+        self, difficulty: str, rng: random.Random = random
+    ) -> tuple[list[list[int]]]:
+        """
+        Return the clues and solution of a random game of difficulty, picked with
+        rng (default: the random module).
+        """
+        records = self.count(difficulty)
+        if not records:
+            raise ValueError(f"No {difficulty} games in the bank")
+        return self.game(difficulty, rng.randrange(records))
+
+    def close(self) -> None:
+        self._map.close()
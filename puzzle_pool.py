@@ -0,0 +1,89 @@
+import json
+import threading
+from collections import deque
+from game_generator import create_game, DIFFICULTY_REMOVAL_RANGES
+
+
+class PuzzlePool:
+    """
+    Keep up to depth ready games (clues, solution) per difficulty,
+    refilled by a background thread. If path is given, leftover games are
+    loaded from it on start and saved to it on close.
+    """
+
+    def __init__(self, depth: int = 3, path: str | None = None) -> None:
+        self._depth = depth
+        self._path = path
+        self._games = {difficulty: deque() for difficulty in DIFFICULTY_REMOVAL_RANGES}
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._load()
+        self._worker = threading.Thread(target=self._refill, daemon=True)
+        self._worker.start()
+
+    def pop(self, difficulty: str) -> tuple[list[list[int]]]:
+        """Return a ready game, generate one on the spot if the pool ran dry."""
+        with self._condition:
+            games = self._games[difficulty]
+            if games:
+                game = games.popleft()
+                self._condition.notify()
+                return game
+        return create_game(difficulty)
+
+    def close(self) -> None:
+        """Stop the background thread and save leftover games."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._worker.join()
+        self._save()
+
+    def _neediest_difficulty(self) -> str | None:
+        """Return the difficulty with the fewest ready games, None if all are full."""
+        difficulty = min(
+            self._games, key=lambda difficulty: len(self._games[difficulty])
+        )
+        return difficulty if len(self._games[difficulty]) < self._depth else None
+
+    def _refill(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and self._neediest_difficulty() is None:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                difficulty = self._neediest_difficulty()
+
+            game = create_game(difficulty)  # Outside the lock, pop stays instant
+            with self._condition:
+                self._games[difficulty].append(game)
+
+    def _load(self) -> None:
+        if self._path is None:
+            return
+        try:
+            with open(self._path) as file:
+                saved = json.load(file)
+            for difficulty, games in self._games.items():
+                for clues, solution in saved.get(difficulty, [])[: self._depth]:
+                    games.append((clues, solution))
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Missing or unreadable file -> start empty
+            for games in self._games.values():
+                games.clear()
+
+    def _save(self) -> None:
+        if self._path is None:
+            return
+        with self._condition:
+            saved = {
+                difficulty: [[clues, solution] for clues, solution in games]
+                for difficulty, games in self._games.items()
+            }
+        try:
+            with open(self._path, "w") as file:
+                json.dump(saved, file)
+        except OSError:
+            pass  # The pool will simply start empty next time
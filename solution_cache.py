@@ -0,0 +1,249 @@
+from collections import namedtuple, OrderedDict
+from itertools import permutations, product
+from math import isqrt
+from board_format import as_board, pack_board, unpack_board
+from cached_board import CachedBoard
+from solver import solve
+
+# canonical[i][j] = nums[board[rows[i]][cols[j]]] (board transposed first if set)
+Transform = namedtuple("Transform", ["transposed", "rows", "cols", "nums"])
+MAX_CANDIDATES = 4096  # Tied transforms kept at most, only symmetric boards get near
+
+
+def _refine(structure: list, filled: int, box_size: int) -> tuple[int, list]:
+    """
+    Order the cols of structure to get the smallest pattern for a row whose filled
+    cols are the bits of filled. Return that pattern (bit set if filled, first col
+    highest) and the structure of the col orders that still give it.
+    structure: groups of interchangeable stacks, in order. Each stack is a list of
+    groups of interchangeable cols (bit col set), in order.
+    """
+    pattern = 0
+    refined = []
+    for stacks in structure:
+        ordered = []
+        for stack in stacks:
+            stack_pattern = 0
+            refined_stack = []
+            for cols in stack:
+                full = cols & filled
+                empty = cols ^ full
+                stack_pattern = (stack_pattern << cols.bit_count()) | (
+                    (1 << full.bit_count()) - 1
+                )
+                if empty:
+                    refined_stack.append(empty)
+                if full:
+                    refined_stack.append(full)
+            ordered.append((stack_pattern, refined_stack))
+        ordered.sort()
+
+        # Stacks with the same pattern stay interchangeable
+        tied = []
+        for i, (stack_pattern, refined_stack) in enumerate(ordered):
+            pattern = (pattern << box_size) | stack_pattern
+            tied.append(refined_stack)
+            if i + 1 == len(ordered) or ordered[i + 1][0] != stack_pattern:
+                refined.append(tied)
+                tied = []
+    return pattern, refined
+
+
+def _col_orders(structure: list, start: int = 0):
+    """Yield every col order left by a structure from _refine, lazily."""
+    if start == len(structure):
+        yield []
+        return
+    for stack_order in permutations(structure[start]):
+        for cols in _stack_orders(stack_order):
+            for rest in _col_orders(structure, start + 1):
+                yield cols + rest
+
+
+def _stack_orders(stacks: tuple):
+    """Yield every col order of stacks placed in this order."""
+    groups = [
+        [col for col in range(cols.bit_length()) if cols >> col & 1]
+        for stack in stacks
+        for cols in stack
+    ]
+    for group_orders in product(*(permutations(cols) for cols in groups)):
+        yield [col for cols in group_orders for col in cols]
+
+
+def canonical_form(board: list[list[int]]) -> tuple[bytes, Transform]:
+    """
+    Return the same key for every board equivalent to board under relabeling nums,
+    swapping rows (cols) within a band (stack), swapping bands (stacks), and
+    transposing, and the transform that turns board into the board the key packs.
+    The key is the smallest such board, packed: empty cells first wherever
+    possible, row by row, then nums relabeled in order of first appearance.
+    Boards with many symmetries only consider MAX_CANDIDATES transforms, so some
+    of their equivalent boards may get other keys.
+    """
+    size = len(board)
+    box_size = isqrt(size)
+    grids = (board, [list(col) for col in zip(*board)])
+
+    # Smallest pattern of filled cells, a row at a time: keep every partial
+    # transform (grid, rows so far, col structure) that ties for the smallest
+    stacks = [[((1 << box_size) - 1) << stack] for stack in range(0, size, box_size)]
+    candidates = [(transposed, (), [stacks]) for transposed in (False, True)]
+    filled = [
+        [sum(1 << col for col, num in enumerate(row) if num) for row in grid]
+        for grid in grids
+    ]
+    for i in range(size):
+        best = None
+        next_candidates = []
+        for transposed, rows, structure in candidates:
+            if i % box_size:  # Rest of the current band
+                band = rows[-1] // box_size * box_size
+                options = range(band, band + box_size)
+            else:  # First row of any band not used yet
+                used = {row // box_size for row in rows}
+                options = [row for row in range(size) if row // box_size not in used]
+            for row in options:
+                if row in rows:
+                    continue
+                pattern, refined = _refine(structure, filled[transposed][row], box_size)
+                if best is None or pattern < best:
+                    best = pattern
+                    next_candidates = []
+                if pattern == best and len(next_candidates) < MAX_CANDIDATES:
+                    next_candidates.append((transposed, rows + (row,), refined))
+        candidates = next_candidates
+
+    # Smallest relabeled board among the transforms giving that pattern
+    best_key = None
+    tried = 0
+    for transposed, rows, structure in candidates:
+        grid = grids[transposed]
+        for cols in _col_orders(structure):
+            nums = [0] * (size + 1)
+            next_num = 1
+            key = []
+            for row in rows:
+                grid_row = grid[row]
+                for col in cols:
+                    num = grid_row[col]
+                    if num and not nums[num]:
+                        nums[num] = next_num
+                        next_num += 1
+                    key.append(nums[num])
+            if best_key is None or key < best_key:
+                best_key = key
+                # Nums missing from board take the labels left, in order
+                for num in range(1, size + 1):
+                    if not nums[num]:
+                        nums[num] = next_num
+                        next_num += 1
+                best_transform = Transform(transposed, rows, tuple(cols), tuple(nums))
+            tried += 1
+            if tried == MAX_CANDIDATES:
+                break
+        if tried == MAX_CANDIDATES:
+            break
+    return bytes(best_key), best_transform
+
+
+def apply_transform(board: list[list[int]], transform: Transform) -> list[list[int]]:
+    """Return a transformed copy of board (canonical_form's key packs this)."""
+    if transform.transposed:
+        board = [list(col) for col in zip(*board)]
+    nums = transform.nums
+    return [[nums[board[row][col]] for col in transform.cols] for row in transform.rows]
+
+
+def revert_transform(board: list[list[int]], transform: Transform) -> list[list[int]]:
+    """Inverse of apply_transform."""
+    size = len(board)
+    original_nums = [0] * (size + 1)
+    for num, canonical_num in enumerate(transform.nums):
+        original_nums[canonical_num] = num
+    reverted = [[0] * size for _ in range(size)]
+    for i, row in enumerate(transform.rows):
+        for j, col in enumerate(transform.cols):
+            reverted[row][col] = original_nums[board[i][j]]
+    if transform.transposed:
+        reverted = [list(col) for col in zip(*reverted)]
+    return reverted
+
+
+class SolutionCache:
+    """
+    Solve boards, remembering the solutions of the last maxsize distinct boards
+    and of the last maxsize canonical forms (least recently used ones go first).
+    A repeated board is answered from a dict of exact boards. An equivalent board
+    (see canonical_form) is answered from the solution stored under its canonical
+    form, turned back to its orientation and nums.
+    """
+
+    def __init__(
+        self, maxsize: int = 1024, strategy: str = "mrv", propagate: bool = True
+    ) -> None:
+        self.maxsize = maxsize
+        self._strategy = strategy
+        self._propagate = propagate
+        # Packed board -> (canonical form, packed solution or None)
+        self._exact = OrderedDict()
+        self._canonical = OrderedDict()  # Canonical form -> packed solution, or None
+        self.hits = 0  # Exact repeats
+        self.canonical_hits = 0  # Equivalent boards
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def clear(self) -> None:
+        self._exact.clear()
+        self._canonical.clear()
+
+    def solve(self, puzzle) -> list[list[int]]:
+        """
+        Return the solution of a board or puzzle string (see parse_board),
+        raise ValueError("No Solution") like solve (cached too).
+        """
+        board = as_board(puzzle)
+        packed = pack_board(board)
+        if packed in self._exact:
+            self._exact.move_to_end(packed)
+            self.hits += 1
+            key, solution = self._exact[packed]
+            if key in self._canonical:  # Keep it as recently used as the board
+                self._canonical.move_to_end(key)
+            return self._unpack(solution)
+
+        cached_board = CachedBoard(board)  # Raise on invalid input, don't cache it
+        key, transform = canonical_form(board)
+        if key in self._canonical:
+            self._canonical.move_to_end(key)
+            self.canonical_hits += 1
+            solution = self._canonical[key]
+            if solution is not None:
+                solution = pack_board(
+                    revert_transform(unpack_board(solution), transform)
+                )
+        else:
+            self.misses += 1
+            try:
+                solve(cached_board, self._strategy, self._propagate)
+            except ValueError:
+                solution = canonical_solution = None
+            else:
+                solution = pack_board(board)
+                canonical_solution = pack_board(apply_transform(board, transform))
+            self._remember(self._canonical, key, canonical_solution)
+        self._remember(self._exact, packed, (key, solution))
+        return self._unpack(solution)
+
+    def _remember(self, entries: OrderedDict, key: bytes, value) -> None:
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    @staticmethod
+    def _unpack(solution: bytes | None) -> list[list[int]]:
+        if solution is None:
+            raise ValueError("No Solution")
+        return unpack_board(solution)
@@ -0,0 +1,58 @@
+import threading
+from board_format import pack_board
+from cached_board import CachedBoard
+from solver import all_solutions, CancelToken, SolverCancelled
+
+
+class SolutionFinder:
+    """
+    Enumerate the solutions of a board on a background thread, packed with
+    pack_board into solutions. The search pauses once wanted solutions are
+    found, call want to ask for more and cancel to stop it.
+    """
+
+    def __init__(self, board: list[list[int]], wanted: int) -> None:
+        self.solutions = []
+        self.complete = False  # Every solution was found
+        self.done = False  # The thread has finished (complete or cancelled)
+        self._wanted = wanted
+        self._condition = threading.Condition()
+        self._cancel = CancelToken()
+
+        # Own copy, the caller's board stays untouched while the search runs
+        board = CachedBoard([row.copy() for row in board])
+        self._worker = threading.Thread(target=self._find, args=(board,), daemon=True)
+        self._worker.start()
+
+    @property
+    def searching(self) -> bool:
+        """True while the thread is looking for solutions, False if paused or done."""
+        return not self.done and len(self.solutions) < self._wanted
+
+    def want(self, count: int) -> None:
+        """Keep searching until count solutions are found."""
+        with self._condition:
+            if count > self._wanted:
+                self._wanted = count
+                self._condition.notify()
+
+    def cancel(self) -> None:
+        self._cancel.cancel()
+        with self._condition:
+            self._condition.notify()
+
+    def _find(self, board: CachedBoard) -> None:
+        try:
+            for solution in all_solutions(board, strategy="dlx", cancel=self._cancel):
+                solution = pack_board(solution)
+                with self._condition:
+                    self.solutions.append(solution)
+                    while (
+                        len(self.solutions) >= self._wanted
+                        and not self._cancel.cancelled
+                    ):
+                        self._condition.wait()
+            self.complete = True
+        except SolverCancelled:
+            pass
+        self.done = True
@@ -1,38 +1,287 @@
-from cached_board import CachedBoard
+from collections import namedtuple
+from contextlib import nullcontext
+from time import monotonic, perf_counter
+from board_format import as_board
+from cached_board import CachedBoard, nums_in
+from parallel import pool_map
 
 
-def solve(board: list[list[int]] | CachedBoard) -> None:
-    """Solve in-place, stop when 1 solution is found."""
+STRATEGIES = ("row-major", "mrv", "dlx")
+_units = {}
+
+
+def units(box_size: int) -> list[list[list[int]]]:
+    """Return the cells of every row, col, and box for box_size x box_size boxes."""
+    if box_size not in _units:
+        size = box_size * box_size
+        _units[box_size] = (
+            [[[row, col] for col in range(size)] for row in range(size)]
+            + [[[row, col] for row in range(size)] for col in range(size)]
+            + [
+                [
+                    [box_row + row, box_col + col]
+                    for row in range(box_size)
+                    for col in range(box_size)
+                ]
+                for box_row in range(0, size, box_size)
+                for box_col in range(0, size, box_size)
+            ]
+        )
+    return _units[box_size]
+
+
+class SolverStats:
+    """
+    Work done by the solver, accumulated over every call it is passed to.
+    A node is a cell (a constraint for dlx) that the search branches on.
+    """
+
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.nums_tried = 0  # Nums put at nodes
+        self.backtracks = 0  # Nodes left after running out of nums
+        self.propagated = 0  # Nums put by fill_singles
+        self.depth = 0  # Depth of the latest node
+        self.max_depth = 0
+        self.wall_time = 0.0  # Seconds spent inside the solver
+
+
+class CancelToken:
+    """Cancel a running search, e.g. from another thread or an on_node callback."""
+
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class SolverInterrupted(Exception):
+    """A search was stopped early, stats holds the work done until then."""
+
+    def __init__(self, message: str, stats: SolverStats) -> None:
+        super().__init__(message)
+        self.stats = stats
+
+
+class SolverTimeout(SolverInterrupted):
+    """The deadline passed or the search visited more than max_nodes nodes."""
+
+
+class SolverCancelled(SolverInterrupted):
+    """The search's CancelToken was cancelled."""
+
+
+class _Monitor:
+    """
+    Keeps stats up to date, calls on_node(stats) at every node, and stops the search
+    once a limit is hit (restoring the board's empty cells first).
+    """
+
+    def __init__(
+        self,
+        board: CachedBoard,
+        stats: SolverStats,
+        on_node,
+        deadline: float | None,
+        max_nodes: int | None,
+        cancel: CancelToken | None,
+    ) -> None:
+        self.stats = stats
+        self._on_node = on_node
+        self._deadline = deadline
+        self._max_nodes = max_nodes
+        self._start_nodes = stats.nodes  # stats may carry the nodes of earlier calls
+        self._cancel = cancel
+        self._limited = not (deadline is None and max_nodes is None and cancel is None)
+        self._board = board
+        self._empty_cells = (
+            [
+                [row, col]
+                for row in range(board.size)
+                for col in range(board.size)
+                if not board.board[row][col]
+            ]
+            if self._limited
+            else []
+        )
+
+    @classmethod
+    def create(
+        cls,
+        board: CachedBoard,
+        stats: SolverStats | None,
+        on_node,
+        deadline: float | None = None,
+        max_nodes: int | None = None,
+        cancel: CancelToken | None = None,
+    ) -> "_Monitor | None":
+        """Return None when nothing is asked for, so the search skips all tracking."""
+        if (stats, on_node, deadline, max_nodes, cancel) == (None,) * 5:
+            return None
+        if stats is None:
+            stats = SolverStats()
+        return cls(board, stats, on_node, deadline, max_nodes, cancel)
+
+    def node(self, depth: int) -> None:
+        stats = self.stats
+        stats.nodes += 1
+        stats.depth = depth
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+        if self._on_node is not None:
+            self._on_node(stats)
+        if self._limited:
+            self._check_limits()
+
+    def _check_limits(self) -> None:
+        if self._cancel is not None and self._cancel.cancelled:
+            raise SolverCancelled("Cancelled", self.stats)
+        if (
+            self._max_nodes is not None
+            and self.stats.nodes - self._start_nodes > self._max_nodes
+        ):
+            raise SolverTimeout(f"More than {self._max_nodes} nodes", self.stats)
+        if self._deadline is not None and monotonic() >= self._deadline:
+            raise SolverTimeout("Deadline passed", self.stats)
+
+    def restore(self) -> None:
+        """Erase every cell that was empty when the search started."""
+        for row, col in self._empty_cells:
+            self._board.erase(row, col)
+
+    def tried(self) -> None:
+        self.stats.nums_tried += 1
+
+    def backtrack(self) -> None:
+        self.stats.backtracks += 1
+
+    def propagated(self, count: int) -> None:
+        self.stats.propagated += count
+
+    def __enter__(self) -> "_Monitor":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        """Add the time spent inside to the stats, restore the board if interrupted."""
+        if exc_type is not None and issubclass(exc_type, SolverInterrupted):
+            self.restore()
+        self.stats.wall_time += perf_counter() - self._start
+
+
+def _monitoring(monitor: _Monitor | None):
+    """Return the context to run a search in (see _Monitor.__exit__)."""
+    return monitor if monitor is not None else nullcontext()
+
+
+def _tracked(solutions, monitor: _Monitor | None):
+    """Yield from solutions, only the time spent producing them counts as solving."""
+    if monitor is None:
+        yield from solutions
+        return
+
+    solutions = iter(solutions)
+    while True:
+        with monitor:
+            try:
+                solution = next(solutions)
+            except StopIteration:
+                return
+        yield solution
+
+
+def _check_strategy(strategy: str) -> None:
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+
+def solve(
+    board: list[list[int]] | CachedBoard,
+    strategy: str = "row-major",
+    propagate: bool = False,
+    stats: SolverStats | None = None,
+    on_node=None,
+    deadline: float | None = None,
+    max_nodes: int | None = None,
+    cancel: CancelToken | None = None,
+) -> None:
+    """
+    Solve in-place, stop when 1 solution is found.
+    Strategies:
+        row-major (visit empty cells in order, test nums in ascending order)
+        mrv (always branch on the empty cell with the fewest candidates)
+        dlx (exact cover search with Dancing Links)
+    If propagate is set, fill_singles runs before the search and after every guess
+    (only before the search for dlx).
+    Pass a SolverStats to record the work done, on_node(stats) is called at every node.
+    Limits (for this and every other solver entry point):
+        deadline (time.monotonic() value) or max_nodes -> SolverTimeout
+        cancel.cancel() called -> SolverCancelled
+    Both carry the stats so far, and leave the board as it was before the call.
+    """
+    _check_strategy(strategy)
     if not isinstance(board, CachedBoard):
         board = CachedBoard(board)
 
+    monitor = _Monitor.create(board, stats, on_node, deadline, max_nodes, cancel)
+    with _monitoring(monitor):
+        if strategy == "dlx":
+            solutions = _exact_cover_search(board, propagate, monitor)
+        elif strategy == "mrv" or propagate:
+            solutions = _search(board, strategy == "mrv", propagate, monitor)
+        else:
+            _solve_row_major(board, monitor)
+            return
+        if next(solutions, None) is None:
+            raise ValueError("No Solution")
+
+
+def _solve_row_major(board: CachedBoard, monitor: _Monitor | None) -> None:
     i, num_empty = 0, len(board.empty_cells)
     while i < num_empty:
         row, col = board.empty_cells[i]
         # Determine starting value to test
         if not board.board[row][col]:  # First time at cell
             start = 1
+            if monitor is not None:
+                monitor.node(i + 1)
         else:  # Previously tested -> erase previous, start at previous + 1
             start = board.board[row][col] + 1
             board.erase(row, col)
 
-        for num in range(start, 10):  # Test possible values
-            if not board.can_put(num, row, col):
-                continue
-            board.put(num, row, col)
+        # Possible values from start onwards
+        mask = board.candidates(row, col) >> (start - 1) << (start - 1)
+        if mask:  # Put the smallest one
+            board.put((mask & -mask).bit_length(), row, col)
+            if monitor is not None:
+                monitor.tried()
             i += 1
-            break
         else:  # None possible -> go to previous cell & try a new num
+            if monitor is not None:
+                monitor.backtrack()
             i -= 1
             if i < 0:
                 raise ValueError("No Solution")
 
 
-def solve_step_by_step(board: list[list[int]] | CachedBoard):
+def solve_step_by_step(
+    board: list[list[int]] | CachedBoard,
+    stats: SolverStats | None = None,
+    on_node=None,
+    deadline: float | None = None,
+    max_nodes: int | None = None,
+    cancel: CancelToken | None = None,
+):
     """Solve in-place, generating each step."""
     if not isinstance(board, CachedBoard):
         board = CachedBoard(board)
 
+    monitor = _Monitor.create(board, stats, on_node, deadline, max_nodes, cancel)
+    yield from _tracked(_steps(board, monitor), monitor)
+
+
+def _steps(board: CachedBoard, monitor: _Monitor | None):
     i, num_empty = 0, len(board.empty_cells)
     while i < num_empty:
         row, col = board.empty_cells[i]
@@ -40,40 +289,543 @@ def solve_step_by_step(board: list[list[int]] | CachedBoard):
         # Determine starting value to test
         if not board.board[row][col]:  # First time at cell
             start = 1
+            if monitor is not None:
+                monitor.node(i + 1)
         else:  # Previously tested -> erase previous, start at previous + 1
             start = board.board[row][col] + 1
             board.erase(row, col)
             yield ("Erase", ())
 
-        for num in range(start, 10):  # Test possible values
-            if not board.can_put(num, row, col):
-                continue
+        # Possible values from start onwards
+        mask = board.candidates(row, col) >> (start - 1) << (start - 1)
+        if mask:  # Put the smallest one
+            num = (mask & -mask).bit_length()
             board.put(num, row, col)
+            if monitor is not None:
+                monitor.tried()
             yield ("Put", (num,))
             i += 1
-            break
         else:  # None possible -> go to previous cell & try a new num
+            if monitor is not None:
+                monitor.backtrack()
             i -= 1
             if i < 0:
                 raise ValueError("No Solution")
 
 
-def all_solutions(board: list[list[int]] | CachedBoard):
+def all_solutions(
+    board: list[list[int]] | CachedBoard,
+    strategy: str = "row-major",
+    propagate: bool = False,
+    stats: SolverStats | None = None,
+    on_node=None,
+    deadline: float | None = None,
+    max_nodes: int | None = None,
+    cancel: CancelToken | None = None,
+):
     """A generator that outputs all possible solutions, does not modify board"""
+    _check_strategy(strategy)
     if not isinstance(board, CachedBoard):
         board = CachedBoard(board)
-    yield from _all_solutions_finder(board, 0)
 
+    monitor = _Monitor.create(board, stats, on_node, deadline, max_nodes, cancel)
+    if strategy == "dlx":
+        solutions = _exact_cover_search(board, propagate, monitor)
+    elif strategy == "mrv" or propagate:
+        solutions = _search(board, strategy == "mrv", propagate, monitor)
+    else:
+        solutions = _all_solutions_finder(board, 0, monitor)
+    yield from _tracked(solutions, monitor)
 
-def _all_solutions_finder(board: CachedBoard, i: int) -> None:
+
+def _all_solutions_finder(board: CachedBoard, i: int, monitor: _Monitor | None):
     if i == len(board.empty_cells):  # solved
         yield board.board
         return
 
+    if monitor is not None:
+        monitor.node(i + 1)
     row, col = board.empty_cells[i]
-    for num in range(1, 10):
-        if not board.can_put(num, row, col):
-            continue
+    for num in nums_in(board.candidates(row, col)):
         board.put(num, row, col)
-        yield from _all_solutions_finder(board, i + 1)
+        if monitor is not None:
+            monitor.tried()
+        yield from _all_solutions_finder(board, i + 1, monitor)
+        board.erase(row, col)
+    if monitor is not None:
+        monitor.backtrack()
+
+
+def fill_singles(board: CachedBoard) -> list[list[int]]:
+    """
+    Repeatedly put naked singles (cells with 1 candidate) and hidden singles
+    (nums with 1 possible cell in a row, col, or box).
+    Return the filled cells, or undo them and raise ValueError on a contradiction.
+    """
+    filled = []
+    all_nums = board.all_nums
+    try:
+        progress = True
+        while progress:
+            progress = False
+
+            for row, col in board.empty_cells:
+                if board.board[row][col]:
+                    continue
+                mask = board.candidates(row, col)
+                if not mask:
+                    raise ValueError("No Solution")
+                if not mask & (mask - 1):  # Naked single
+                    board.put(mask.bit_length(), row, col)
+                    filled.append([row, col])
+                    progress = True
+
+            for unit in units(board.box_size):
+                # Nums possible in at least once / at least twice among empty cells
+                once = twice = used = 0
+                for row, col in unit:
+                    num = board.board[row][col]
+                    if num:
+                        used |= 1 << (num - 1)
+                        continue
+                    mask = board.candidates(row, col)
+                    twice |= once & mask
+                    once |= mask
+                if once | used != all_nums:  # Some num has nowhere to go
+                    raise ValueError("No Solution")
+
+                hidden = once & ~twice
+                if not hidden:
+                    continue
+                for row, col in unit:
+                    if board.board[row][col]:
+                        continue
+                    mask = board.candidates(row, col) & hidden
+                    if not mask:
+                        continue
+                    if mask & (mask - 1):  # Cell is the only place for 2 nums
+                        raise ValueError("No Solution")
+                    board.put(mask.bit_length(), row, col)
+                    filled.append([row, col])
+                    progress = True
+    except ValueError:
+        for row, col in reversed(filled):
+            board.erase(row, col)
+        raise
+
+    return filled
+
+
+def _first_empty_cell(board: CachedBoard) -> tuple[int, int, int] | None:
+    """Return (row, col, candidates) of the first empty cell, or None if full."""
+    for row, col in board.empty_cells:
+        if not board.board[row][col]:
+            return row, col, board.candidates(row, col)
+    return None
+
+
+def _most_constrained_cell(board: CachedBoard) -> tuple[int, int, int] | None:
+    """
+    Return (row, col, candidates) of the empty cell with the fewest candidates.
+    Return None if the board is full, or candidates = 0 on a dead end.
+    """
+    best = None
+    best_count = board.size + 1
+    for row, col in board.empty_cells:
+        if board.board[row][col]:
+            continue
+        mask = board.candidates(row, col)
+        count = mask.bit_count()
+        if count < best_count:
+            best, best_count = (row, col, mask), count
+            if count <= 1:  # Can't do better (or dead end)
+                break
+    return best
+
+
+def _search(
+    board: CachedBoard,
+    mrv: bool,
+    propagate: bool,
+    monitor: _Monitor | None = None,
+    depth: int = 0,
+):
+    """Yield the board every time it is solved, restore it when exhausted."""
+    filled = []
+    if propagate:
+        try:
+            filled = fill_singles(board)
+        except ValueError:
+            return
+        if monitor is not None:
+            monitor.propagated(len(filled))
+
+    cell = _most_constrained_cell(board) if mrv else _first_empty_cell(board)
+    if cell is None:  # solved
+        yield board.board
+    else:
+        if monitor is not None:
+            monitor.node(depth + 1)
+        row, col, mask = cell
+        for num in nums_in(mask):
+            board.put(num, row, col)
+            if monitor is not None:
+                monitor.tried()
+            yield from _search(board, mrv, propagate, monitor, depth + 1)
+            board.erase(row, col)
+        if monitor is not None:
+            monitor.backtrack()
+
+    for row, col in reversed(filled):
+        board.erase(row, col)
+
+
+def exact_cover_solutions(
+    board: list[list[int]] | CachedBoard,
+    propagate: bool = False,
+    stats: SolverStats | None = None,
+    on_node=None,
+    deadline: float | None = None,
+    max_nodes: int | None = None,
+    cancel: CancelToken | None = None,
+):
+    """Generate all solutions with Dancing Links, does not modify board"""
+    if not isinstance(board, CachedBoard):
+        board = CachedBoard(board)
+
+    monitor = _Monitor.create(board, stats, on_node, deadline, max_nodes, cancel)
+    yield from _tracked(_exact_cover_search(board, propagate, monitor), monitor)
+
+
+def _exact_cover_search(board: CachedBoard, propagate: bool, monitor: _Monitor | None):
+    filled = []
+    if propagate:
+        try:
+            filled = fill_singles(board)
+        except ValueError:
+            return
+        if monitor is not None:
+            monitor.propagated(len(filled))
+
+    yield from _ExactCover(board, monitor=monitor).solutions()
+
+    for row, col in reversed(filled):
         board.erase(row, col)
+
+
+def count_solutions(
+    board: list[list[int]] | CachedBoard,
+    limit: int | None = None,
+    stats: SolverStats | None = None,
+    on_node=None,
+    deadline: float | None = None,
+    max_nodes: int | None = None,
+    cancel: CancelToken | None = None,
+) -> int:
+    """Count solutions with Dancing Links, stop early once limit is reached."""
+    if not isinstance(board, CachedBoard):
+        board = CachedBoard(board)
+    if limit is not None and limit <= 0:
+        return 0
+
+    monitor = _Monitor.create(board, stats, on_node, deadline, max_nodes, cancel)
+    count = 0
+    with _monitoring(monitor):
+        try:
+            filled = fill_singles(board)
+        except ValueError:
+            return count
+        if monitor is not None:
+            monitor.propagated(len(filled))
+        for _ in _ExactCover(board, fill=False, monitor=monitor).solutions():
+            count += 1
+            if count == limit:
+                break
+        for row, col in reversed(filled):
+            board.erase(row, col)
+    return count
+
+
+def has_unique_solution(
+    board: list[list[int]] | CachedBoard,
+    stats: SolverStats | None = None,
+    on_node=None,
+    deadline: float | None = None,
+    max_nodes: int | None = None,
+    cancel: CancelToken | None = None,
+) -> bool:
+    """Check for exactly 1 solution, stop as soon as a 2nd one is found."""
+    if not isinstance(board, CachedBoard):
+        board = CachedBoard(board)
+
+    monitor = _Monitor.create(board, stats, on_node, deadline, max_nodes, cancel)
+    with _monitoring(monitor):
+        return _count_search(board, 2, monitor) == 1
+
+
+# index: position of the puzzle in the input, solution or error is None
+SolveResult = namedtuple("SolveResult", ["index", "solution", "error"])
+
+
+def solve_many(
+    puzzles,
+    workers: int | None = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+    strategy: str = "mrv",
+    propagate: bool = True,
+    timeout: float | None = None,
+    max_nodes: int | None = None,
+):
+    """
+    Solve boards or puzzle strings (see parse_board) across a pool of worker processes
+    (default: 1 per CPU, workers=1 solves in this process).
+    Yield a SolveResult per puzzle, in input order or as they complete;
+    a puzzle that fails gets its error message instead of stopping the batch.
+    Puzzles are read a few chunks per worker ahead (see pool_map), so memory stays
+    flat.
+    timeout (seconds) and max_nodes bound the work spent on each puzzle.
+    """
+    _check_strategy(strategy)
+    tasks = (
+        (index, puzzle, strategy, propagate, timeout, max_nodes)
+        for index, puzzle in enumerate(puzzles)
+    )
+    yield from pool_map(_solve_task, tasks, workers, chunksize, ordered)
+
+
+def _solve_task(task: tuple) -> SolveResult:
+    index, puzzle, strategy, propagate, timeout, max_nodes = task
+    deadline = monotonic() + timeout if timeout is not None else None
+    try:
+        if isinstance(puzzle, CachedBoard):
+            puzzle = puzzle.board
+        board = as_board(puzzle)
+        solve(board, strategy, propagate, deadline=deadline, max_nodes=max_nodes)
+    except (ValueError, SolverInterrupted) as error:
+        return SolveResult(index, None, str(error))
+    return SolveResult(index, board, None)
+
+
+def _count_search(
+    board: CachedBoard, limit: int, monitor: _Monitor | None = None, depth: int = 0
+) -> int:
+    """Count up to limit solutions with singles and mrv, always restore the board."""
+    try:
+        filled = fill_singles(board)
+    except ValueError:
+        return 0
+    if monitor is not None:
+        monitor.propagated(len(filled))
+
+    count = 0
+    cell = _most_constrained_cell(board)
+    if cell is None:  # solved
+        count = 1
+    else:
+        if monitor is not None:
+            monitor.node(depth + 1)
+        row, col, mask = cell
+        for num in nums_in(mask):
+            board.put(num, row, col)
+            if monitor is not None:
+                monitor.tried()
+            count += _count_search(board, limit - count, monitor, depth + 1)
+            board.erase(row, col)
+            if count >= limit:
+                break
+        else:
+            if monitor is not None:
+                monitor.backtrack()
+
+    for row, col in reversed(filled):
+        board.erase(row, col)
+    return count
+
+
+class _ExactCover:
+    """
+    Knuth's Algorithm X with Dancing Links, over the constraints left on a board:
+    every empty cell needs a num, every row, col, and box needs its missing nums.
+    Nodes are indices into parallel lists, node 0 is the root header.
+    """
+
+    def __init__(
+        self, board: CachedBoard, fill: bool = True, monitor: _Monitor | None = None
+    ) -> None:
+        self._board = board if fill else None
+        self._monitor = monitor
+        self._left, self._right, self._up, self._down = [0], [0], [0], [0]
+        self._column = [0]
+        self._size = [0]
+        self._choice = [None]  # Node -> (row, col, num) of the matrix row it is in
+        self._headers = {}  # Constraint -> header node
+
+        # Constraints, n = size and cells = n * n: cell (0 to cells - 1), then
+        # row-num, col-num, and box-num (cells each, from cells, 2 cells, 3 cells)
+        n = board.size
+        cells = n * n
+        box_index = board.box_index
+        used_in_row, used_in_col, used_in_box = [0] * n, [0] * n, [0] * n
+        for row in range(n):
+            for col in range(n):
+                num = board.board[row][col]
+                if num:
+                    used_in_row[row] |= 1 << (num - 1)
+                    used_in_col[col] |= 1 << (num - 1)
+                    used_in_box[box_index[row][col]] |= 1 << (num - 1)
+                else:
+                    self._add_header(row * n + col)
+        for offset, used_in_unit in (
+            (cells, used_in_row),
+            (2 * cells, used_in_col),
+            (3 * cells, used_in_box),
+        ):
+            for unit, used in enumerate(used_in_unit):
+                for num in nums_in(board.all_nums & ~used):
+                    self._add_header(offset + unit * n + num - 1)
+
+        for row in range(n):
+            for col in range(n):
+                if board.board[row][col]:
+                    continue
+                for num in nums_in(board.candidates(row, col)):
+                    self._add_row(
+                        (row, col, num),
+                        (
+                            row * n + col,
+                            cells + row * n + num - 1,
+                            2 * cells + col * n + num - 1,
+                            3 * cells + box_index[row][col] * n + num - 1,
+                        ),
+                    )
+
+    def _add_node(self, header: int, choice: tuple[int, int, int] | None) -> int:
+        node = len(self._left)
+        self._left.append(node)
+        self._right.append(node)
+        # Insert at the bottom of the header's column
+        self._up.append(self._up[header])
+        self._down.append(header)
+        self._down[self._up[header]] = node
+        self._up[header] = node
+        self._column.append(header)
+        self._size.append(0)
+        self._choice.append(choice)
+        return node
+
+    def _add_header(self, constraint: int) -> None:
+        node = len(self._left)
+        # Insert at the end of the root's row, with an empty column below
+        self._left.append(self._left[0])
+        self._right.append(0)
+        self._right[self._left[0]] = node
+        self._left[0] = node
+        self._up.append(node)
+        self._down.append(node)
+        self._column.append(node)
+        self._size.append(0)
+        self._choice.append(None)
+        self._headers[constraint] = node
+
+    def _add_row(
+        self, choice: tuple[int, int, int], constraints: tuple[int, ...]
+    ) -> None:
+        first = None
+        for constraint in constraints:
+            header = self._headers[constraint]
+            node = self._add_node(header, choice)
+            self._size[header] += 1
+            if first is None:
+                first = node
+                continue
+            self._left[node] = self._left[first]
+            self._right[node] = first
+            self._right[self._left[first]] = node
+            self._left[first] = node
+
+    def _cover(self, header: int) -> None:
+        left, right, up, down = self._left, self._right, self._up, self._down
+        column, size = self._column, self._size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, header: int) -> None:
+        left, right, up, down = self._left, self._right, self._up, self._down
+        column, size = self._column, self._size
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def solutions(self):
+        """
+        Yield every exact cover: the filled board if fill is set, else None.
+        The board is restored when exhausted.
+        """
+        yield from self._search(0)
+
+    def _search(self, depth: int):
+        right, size = self._right, self._size
+        if right[0] == 0:  # All constraints satisfied
+            yield self._board.board if self._board is not None else None
+            return
+
+        # Branch on the constraint with the fewest options
+        header = best = right[0]
+        while header != 0:
+            if size[header] < size[best]:
+                best = header
+                if size[best] <= 1:
+                    break
+            header = right[header]
+        monitor = self._monitor
+        if monitor is not None:
+            monitor.node(depth + 1)
+        if not size[best]:
+            if monitor is not None:
+                monitor.backtrack()
+            return
+
+        column, left, down = self._column, self._left, self._down
+        self._cover(best)
+        node = down[best]
+        while node != best:
+            if self._board is not None:
+                row, col, num = self._choice[node]
+                self._board.put(num, row, col)
+            if monitor is not None:
+                monitor.tried()
+            j = right[node]
+            while j != node:
+                self._cover(column[j])
+                j = right[j]
+
+            yield from self._search(depth + 1)
+
+            j = left[node]
+            while j != node:
+                self._uncover(column[j])
+                j = left[j]
+            if self._board is not None:
+                self._board.erase(row, col)
+            node = down[node]
+        self._uncover(best)
+        if monitor is not None:
+            monitor.backtrack()
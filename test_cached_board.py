@@ -0,0 +1,40 @@
+import pytest
+from cached_board import CachedBoard
+
+
+def test_nested_checkpoints_with_no_change_between_them():
+    for close_inner in ("commit", "rollback"):
+        board = CachedBoard()
+        outer = board.checkpoint()
+        inner = board.checkpoint()
+        getattr(board, close_inner)(inner)
+        board.put(5, 0, 0)
+        board.rollback(outer)
+        assert board.board[0][0] == 0
+        assert board.can_put(5, 0, 0)
+
+
+def test_rollback_undoes_committed_inner_changes():
+    board = CachedBoard()
+    outer = board.checkpoint()
+    board.put(1, 0, 0)
+    inner = board.checkpoint()
+    board.put(2, 0, 1)
+    board.commit(inner)
+    inner = board.checkpoint()
+    board.put(3, 0, 2)
+    board.rollback(inner)
+    assert board.board[0][:3] == [1, 2, 0]
+    board.rollback(outer)
+    assert board.board[0][:3] == [0, 0, 0]
+    assert all(board.can_put(num, 0, 0) for num in range(1, 10))
+
+
+def test_closing_an_outer_checkpoint_first_raises():
+    board = CachedBoard()
+    outer = board.checkpoint()
+    board.checkpoint()
+    with pytest.raises(ValueError):
+        board.commit(outer)
+    with pytest.raises(ValueError):
+        board.rollback(outer)